@@ -1,19 +1,31 @@
 from flask import Flask
 from app.config import Config
 from app.extensions import db, migrate
+from app.utils.json_provider import FastJSONProvider
 from app.routes.user_routes import user_bp
+from app.services.user_service import UserService
 from app.routes.snap_routes import snap_bp
+from app.routes.metrics_routes import metrics_bp
+from app.services.snap_loader import snap_loader
+from app.cli import register_commands
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = FastJSONProvider(app)
 
     db.init_app(app)
     migrate.init_app(app, db)
+    UserService.init_app(app)
+    # 截图服务在第一次请求截图接口时才初始化，或由 SNAP_LAZY_INIT / SNAP_WARMUP 提前
+    snap_loader.init_app(app)
+    register_commands(app)
 
     app.register_blueprint(user_bp, url_prefix='/user')
     app.register_blueprint(snap_bp, url_prefix='/snap')
+    app.register_blueprint(metrics_bp)
     return app
 
 if __name__ == '__main__':
-    create_app().run(debug=True)
+    app = create_app()
+    app.run(debug=app.config['DEBUG'], threaded=True)
@@ -0,0 +1,77 @@
+"""
+flask startup-budget：在全新子进程中测量 create_app() 的冷启动耗时（导入 + 初始化），
+超过预算或加载了不应在启动时导入的模块时以非 0 状态退出，可用于 CI。
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+import click
+
+_PROBE = (
+    "import sys, time\n"
+    "t = time.perf_counter()\n"
+    "from app import create_app\n"
+    "create_app()\n"
+    "print('elapsed_ms', (time.perf_counter() - t) * 1000)\n"
+    "print('modules', ','.join(sorted({m.split('.')[0] for m in sys.modules})))\n"
+)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _probe():
+    """:return: (耗时毫秒, 已加载的顶层模块集合, -X importtime 输出)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise click.ClickException(f"create_app() 失败:\n{proc.stderr[-2000:]}")
+    values = dict(line.split(" ", 1) for line in proc.stdout.splitlines() if " " in line)
+    return float(values["elapsed_ms"]), set(values["modules"].split(",")), proc.stderr
+
+
+def _top_packages(importtime, count):
+    """按顶层包汇总 -X importtime 的自身耗时，返回耗时最多的包"""
+    totals = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(own) / 1000
+    return sorted(((ms, name) for name, ms in totals.items()), reverse=True)[:count]
+
+
+def register_commands(app):
+    @app.cli.command("startup-budget")
+    @click.option("--budget-ms", type=float, default=None, help="冷启动耗时预算，默认取 STARTUP_BUDGET_MS")
+    @click.option("--runs", type=int, default=3, help="测量次数，取中位数与预算比较")
+    @click.option("--top", type=int, default=10, help="列出导入耗时最多的包数")
+    @click.option("--forbid", multiple=True, default=("playwright",), help="启动时不允许加载的顶层模块")
+    def startup_budget(budget_ms, runs, top, forbid):
+        budget_ms = budget_ms if budget_ms is not None else app.config.get("STARTUP_BUDGET_MS", 1500)
+        samples = []
+        modules = set()
+        importtime = ""
+        for _ in range(max(1, runs)):
+            elapsed, modules, importtime = _probe()
+            samples.append(elapsed)
+        median = statistics.median(samples)
+
+        click.echo(f"create_app() 冷启动: 中位数 {median:.0f}ms，首次 {samples[0]:.0f}ms，预算 {budget_ms:.0f}ms")
+        for ms, name in _top_packages(importtime, top):
+            click.echo(f"  {ms:8.1f}ms  {name}")
+
+        failures = []
+        if median > budget_ms:
+            failures.append(f"超出预算 {median - budget_ms:.0f}ms")
+        loaded = sorted(set(forbid) & modules)
+        if loaded:
+            failures.append(f"启动时加载了 {', '.join(loaded)}")
+        if failures:
+            raise click.ClickException("；".join(failures))
+        click.echo("OK")
@@ -1,10 +1,26 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def _load_dotenv():
+    """从 app 目录向上查找 .env，找到时才导入 python-dotenv，没有 .env 的部署不付出导入成本"""
+    path = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        env_file = os.path.join(path, '.env')
+        if os.path.isfile(env_file):
+            from dotenv import load_dotenv
+            load_dotenv(env_file)
+            return
+        parent = os.path.dirname(path)
+        if parent == path:
+            return
+        path = parent
+
+
+_load_dotenv()
 
 class Config:
-    DEBUG = True
+    # 调试模式（Werkzeug 调试器与自动重载）只在开发环境开启
+    DEBUG = os.getenv('FLASK_DEBUG', 'false').lower() in ('1', 'true', 'yes')
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret')
 
     DB_HOST = os.getenv('DB_HOST')
@@ -13,8 +29,85 @@ class Config:
     DB_USER = os.getenv('DB_USER')
     DB_PASSWORD = os.getenv('DB_PASSWORD')
 
-    SQLALCHEMY_DATABASE_URI = (
+    # DATABASE_URL 可直接指定连接串（如测试用 sqlite:///test.db），否则按 DB_* 拼接 MySQL 连接串
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL') or (
         f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}"
         f"@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # 连接池：SQLite 不使用连接池参数
+    SQLALCHEMY_ENGINE_OPTIONS = {} if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    }
+
+    # 用户读缓存：条目数上限与存活时间（秒）
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 300))
+
+    # 批量创建每个事务的行数；批量查询单次请求的最多 id 数
+    USER_BULK_CHUNK = int(os.getenv('USER_BULK_CHUNK', 1000))
+    USER_BATCH_MAX_IDS = int(os.getenv('USER_BATCH_MAX_IDS', 10000))
+
+    # JSON 响应中列表元素数达到此值时流式编码输出，0 表示不启用
+    JSON_STREAM_THRESHOLD = int(os.getenv('JSON_STREAM_THRESHOLD', 1000))
+
+    # 截图浏览器池：槽位数为 0 时每次请求单独启动浏览器
+    SNAP_POOL_SIZE = int(os.getenv('SNAP_POOL_SIZE', 2))
+    SNAP_POOL_MAX_USES = int(os.getenv('SNAP_POOL_MAX_USES', 200))
+    SNAP_POOL_MAX_RSS_MB = int(os.getenv('SNAP_POOL_MAX_RSS_MB', 1024))
+    # 页面复用：单个预热页面最多服务的任务数，0 表示每个任务新建 context
+    SNAP_POOL_PAGE_MAX_USES = int(os.getenv('SNAP_POOL_PAGE_MAX_USES', 0))
+
+    # 异步截图引擎同时在途的页面数
+    SNAP_ASYNC_CONCURRENCY = int(os.getenv('SNAP_ASYNC_CONCURRENCY', 32))
+
+    # 异步任务队列：工作线程数、排队上限、默认截止时间与结果保留时间（秒）
+    SNAP_JOB_WORKERS = int(os.getenv('SNAP_JOB_WORKERS', 4))
+    SNAP_JOB_MAX_QUEUE = int(os.getenv('SNAP_JOB_MAX_QUEUE', 100))
+    SNAP_JOB_TIMEOUT = int(os.getenv('SNAP_JOB_TIMEOUT', 120))
+    SNAP_JOB_RESULT_TTL = int(os.getenv('SNAP_JOB_RESULT_TTL', 3600))
+
+    # 截图结果缓存：总字节数、条目数、存活时间（秒）上限
+    SNAP_CACHE_INDEX = os.getenv('SNAP_CACHE_INDEX', 'app/static/storage/snap_cache.json')
+    SNAP_CACHE_MAX_BYTES = int(os.getenv('SNAP_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    SNAP_CACHE_MAX_ENTRIES = int(os.getenv('SNAP_CACHE_MAX_ENTRIES', 10000))
+    SNAP_CACHE_MAX_AGE = int(os.getenv('SNAP_CACHE_MAX_AGE', 86400))
+    # URL 页面是否在每次截图前发 HEAD 请求取 ETag / Last-Modified 作缓存指纹，关闭时 URL 页面不缓存
+    SNAP_CACHE_URL_VALIDATION = os.getenv('SNAP_CACHE_URL_VALIDATION', 'false').lower() in ('1', 'true', 'yes')
+
+    # 多进程截图集群：是否允许使用（engine=fleet 或默认引擎为 fleet），关闭时退回 sync
+    SNAP_FLEET_ENABLED = os.getenv('SNAP_FLEET_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    # 进程数为 0 时按 CPU 核数；每个进程的浏览器池大小；全部进程总内存上限（MB，0 不限）
+    SNAP_FLEET_WORKERS = int(os.getenv('SNAP_FLEET_WORKERS', 0))
+    SNAP_FLEET_POOL_SIZE = int(os.getenv('SNAP_FLEET_POOL_SIZE', 2))
+    SNAP_FLEET_MAX_RSS_MB = int(os.getenv('SNAP_FLEET_MAX_RSS_MB', 0))
+    SNAP_FLEET_PIN_CPUS = os.getenv('SNAP_FLEET_PIN_CPUS', 'false').lower() in ('1', 'true', 'yes')
+
+    # 截图页面请求拦截：屏蔽的资源类型、URL 正则（逗号分隔，留空使用内置统计/广告列表），
+    # 以及从本地目录返回的静态资源（"URL前缀=目录,URL前缀=目录"）
+    SNAP_BLOCK_RESOURCE_TYPES = os.getenv('SNAP_BLOCK_RESOURCE_TYPES', 'media')
+    SNAP_BLOCK_URL_PATTERNS = os.getenv('SNAP_BLOCK_URL_PATTERNS', '')
+    SNAP_LOCAL_ASSETS = os.getenv('SNAP_LOCAL_ASSETS', '')
+
+    # 截图页面共享的静态资源缓存：目录与资源体总字节数上限（0 表示不启用）
+    SNAP_ASSET_CACHE_DIR = os.getenv('SNAP_ASSET_CACHE_DIR', 'app/static/storage/assets')
+    SNAP_ASSET_CACHE_MAX_BYTES = int(os.getenv('SNAP_ASSET_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+    # 批量截图接口单次请求的最大条目数
+    SNAP_BATCH_MAX_ITEMS = int(os.getenv('SNAP_BATCH_MAX_ITEMS', 1000))
+
+    # 未指定 engine 时使用的截图引擎：sync / async / fleet
+    SNAP_DEFAULT_ENGINE = os.getenv('SNAP_DEFAULT_ENGINE', 'sync')
+
+    # 截图服务默认在第一次请求时初始化；SNAP_LAZY_INIT=false 时在 create_app 中初始化，
+    # SNAP_WARMUP=true 时同时启动默认引擎的浏览器
+    SNAP_LAZY_INIT = os.getenv('SNAP_LAZY_INIT', 'true').lower() in ('1', 'true', 'yes')
+    SNAP_WARMUP = os.getenv('SNAP_WARMUP', 'false').lower() in ('1', 'true', 'yes')
+
+    # flask startup-budget 的冷启动耗时预算（毫秒）
+    STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 1500))
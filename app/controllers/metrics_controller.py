@@ -0,0 +1,5 @@
+from flask import Response
+from app.utils.metrics import registry
+
+def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
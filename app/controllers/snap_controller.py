@@ -1,24 +1,393 @@
+import copy
+import json
+import os
 import time
+from concurrent.futures import FIRST_COMPLETED, wait
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 from app.services.snap_service import PlaywrightSnapService
+from app.services.async_snap_service import AsyncPlaywrightSnapService
+from app.services.snap_fleet import SnapFleet
+from app.services.snap_job_service import SnapJobQueue, QueueFullError
+from app.services.scheduling import AdmissionRejected, DeadlineExceeded
+from app.services.snap_options import InvalidOption, normalize_options, capture_key_options
+from app.services.snap_storage import load_images
+from app.services.image_encoding import mimetype_for
+from app.utils.response import zip_stream, should_stream, success_stream
+from app.utils.json_provider import dumps_bytes
+from app.utils.metrics import SNAP_CAPTURE_SECONDS, SNAP_CAPTURES_TOTAL
+from app.utils.singleflight import SingleFlight
+from app.services.snap_cache import SnapResultCache
+from app.services.asset_cache import asset_cache
+from app.services import static_fast_path
+from app.services.browser_pool import CONTEXT_OPTIONS
 
 snap_bp = Blueprint('snap', __name__)
 snap_service = PlaywrightSnapService()
+async_snap_service = AsyncPlaywrightSnapService()
+snap_fleet = SnapFleet()
+snap_cache = SnapResultCache()
+snap_flight = SingleFlight()
+
+
+def _parse_snap_params(data):
+    """
+    解析截图请求参数，缺少 html_path 时返回 None
+    :raises InvalidOption: 参数值无法转换
+    """
+    html_path = data.get("html_path")
+    if not html_path:
+        return None
+    return {
+        "html_path": html_path,
+        "element_ids": data.get("element_ids", []),
+        "task_token": data.get("task_token", str(int(time.time()))),
+        "engine": _select_engine(data.get("engine")),
+        "options": normalize_options(data)
+    }
+
+
+def _select_engine(requested):
+    """
+    请求指定的引擎，未指定时使用 SNAP_DEFAULT_ENGINE；
+    fleet 会按 CPU 核数启动工作进程，只在 SNAP_FLEET_ENABLED 开启时可用，否则退回 sync
+    """
+    engine = requested or current_app.config.get("SNAP_DEFAULT_ENGINE", "sync")
+    if engine not in _ENGINES:
+        return "sync"
+    if engine == "fleet" and not current_app.config.get("SNAP_FLEET_ENABLED", False):
+        return "sync"
+    return engine
+
+
+_ENGINES = {"sync": snap_service, "async": async_snap_service, "fleet": snap_fleet}
+
+
+def run_capture(params, timeout=None):
+    """
+    按 engine 选择截图引擎执行，engine=async 时多个请求并发复用同一个浏览器，
+    engine=fleet 时分发到多进程集群中负载最低的工作进程。
+    相同页面内容与参数的请求直接返回缓存的截图文件；完全相同的并发请求只截一次图，共享同一结果。
+    """
+    options = params["options"]
+    started = time.time()
+    cache_key, cached = _cache_lookup(params)
+    if cached is not None:
+        _observe("cache", cached, time.time() - started)
+        return cached
+
+    engine = params.get("engine")
+    if engine not in _ENGINES:
+        engine = "sync"
+    service = _ENGINES[engine]
+
+    def capture():
+        try:
+            result = service.capture_snap(
+                html_path=params["html_path"],
+                task_token=params["task_token"],
+                element_ids=params["element_ids"],
+                timeout=timeout,
+                options=options
+            )
+        except Exception:
+            _observe(engine, None, time.time() - started)
+            raise
+        _observe(engine, result, time.time() - started)
+
+        if cache_key:
+            snap_cache.put(cache_key, result)
+        return result
+
+    result, shared = snap_flight.do(_flight_key(params), capture, timeout)
+    if shared:
+        result = copy.deepcopy(result)
+        result["coalesced"] = True
+        _observe("coalesced", result, time.time() - started)
+    return result
+
+
+def _cache_lookup(params):
+    """:return: (缓存键, 缓存的结果)，不使用缓存或未命中时结果为 None"""
+    options = params["options"]
+    if not options["cache"]:
+        return None, None
+    cache_key = snap_cache.make_key(
+        params["html_path"], params["element_ids"], capture_key_options(options), CONTEXT_OPTIONS["viewport"]
+    )
+    return cache_key, (snap_cache.get(cache_key) if cache_key else None)
+
+
+def _flight_key(params):
+    """在途请求合并键：规范化路径 + 视口 + 元素列表 + 影响截图内容与结果形式的参数"""
+    html_path = params["html_path"]
+    if not html_path.startswith("http"):
+        html_path = os.path.abspath(html_path)
+    options = params["options"]
+    return json.dumps({
+        "page": html_path,
+        "viewport": CONTEXT_OPTIONS["viewport"],
+        "element_ids": list(params["element_ids"] or []),
+        "options": capture_key_options(options),
+        "persist": options["persist"],
+        "response_mode": options["response_mode"]
+    }, sort_keys=True)
+
+
+def _observe(engine, result, seconds):
+    if result is None:
+        status = "error"
+    elif not result["failed"]:
+        status = "ok"
+    elif result["success"]:
+        status = "partial"
+    else:
+        status = "failed"
+    SNAP_CAPTURE_SECONDS.observe(seconds, engine=engine, status=status)
+    SNAP_CAPTURES_TOTAL.inc(engine=engine, status=status)
+
+
+snap_job_queue = SnapJobQueue(runner=run_capture)
+
+
+def _respond(params, result):
+    """
+    response_mode=file 时返回 JSON 结果；stream 时直接返回图片：单张按输出格式返回，多张为 zip（附 result.json）
+    """
+    data = {k: v for k, v in result.items() if k != "images"}
+    if params["options"]["response_mode"] != "stream" or not result["success"]:
+        if should_stream(len(result["success"]) + len(result["failed"])):
+            return success_stream(data)
+        return jsonify({"code": 0, "data": data})
+
+    images = result.get("images")
+    if images is None:
+        # 缓存命中的结果只有文件名，从磁盘读回
+        images = load_images(result)
+    headers = {
+        "X-Snap-Success": str(len(result["success"])),
+        "X-Snap-Failed": str(len(result["failed"]))
+    }
+    if len(images) == 1 and not result["failed"]:
+        filename, image = next(iter(images.items()))
+        headers["Content-Disposition"] = f'inline; filename="{filename}"'
+        return Response(image, mimetype=mimetype_for(filename), headers=headers)
+
+    files = dict(images)
+    files["result.json"] = dumps_bytes(data)
+    headers["Content-Disposition"] = f'attachment; filename="snap{params["task_token"]}.zip"'
+    return Response(zip_stream(files), mimetype="application/zip", headers=headers)
+
+
+def _invalid(error):
+    return jsonify({"code": 1, "msg": str(error)}), 400
+
+
+def _number(data, key, cast):
+    """
+    请求中的数值参数，缺省为 None
+    :raises InvalidOption: 无法转换
+    """
+    value = data.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise InvalidOption(key) from None
+
 
 def snap():
+    try:
+        params = _parse_snap_params(request.json or {})
+    except InvalidOption as e:
+        return _invalid(e)
+    if params is None:
+        return jsonify({"code": 1, "msg": "html_path required"})
+
+    try:
+        result = run_capture(params)
+    except AdmissionRejected as e:
+        return _rejected(e)
+    except DeadlineExceeded as e:
+        return _rejected(e, status=504)
+
+    return _respond(params, result)
+
+
+def _rejected(error, status=503):
+    """
+    预计无法在截止时间前完成（503）或在队列中等到过期（504）的请求，提示重试时间
+    """
+    response = jsonify({"code": 1, "msg": str(error)})
+    response.status_code = status
+    response.headers["Retry-After"] = str(getattr(error, "retry_after", 1))
+    return response
+
+
+def batch_snap():
+    """
+    批量截图：items 中每一项为 {html_path, element_ids, task_token}，其余参数对所有项生效（单项可覆盖）。
+    所有项在共享浏览器中并发截图（concurrency 限制本批次同时在途的页面数），
+    每完成一项输出一行 NDJSON，最后一行为汇总。
+    """
     data = request.json or {}
-    html_path = data.get("html_path")
-    element_ids = data.get("element_ids", [])
-    task_token = data.get("task_token", str(int(time.time())))
+    items = data.get("items")
+    max_items = current_app.config.get("SNAP_BATCH_MAX_ITEMS", 1000)
+    if not isinstance(items, list) or not items:
+        return jsonify({"code": 1, "msg": "items required"})
+    if len(items) > max_items:
+        return jsonify({"code": 1, "msg": f"too many items, max {max_items}"}), 413
 
-    if not html_path:
+    shared = {k: v for k, v in data.items() if k not in ("items", "concurrency")}
+    try:
+        normalize_options(shared)
+        requested = _number(data, "concurrency", int)
+    except InvalidOption as e:
+        return _invalid(e)
+
+    # 每一项为截图参数，或无法截图时的错误信息
+    batch = []
+    for index, item in enumerate(items):
+        try:
+            params = _parse_snap_params(dict(shared, **item)) if isinstance(item, dict) else None
+        except InvalidOption as e:
+            batch.append(str(e))
+            continue
+        if params is None:
+            batch.append("html_path required")
+            continue
+        # 批量结果逐行返回 JSON，不支持在响应中直接返回图片
+        params["options"]["response_mode"] = "file"
+        if not (item.get("priority") or shared.get("priority")):
+            # 批量截图默认走批量通道，不与交互请求争抢页面
+            params["options"]["priority"] = "batch"
+        params["task_token"] = str(item.get("task_token") or f"{int(time.time())}_{index}")
+        batch.append(params)
+
+    limit = current_app.config.get("SNAP_ASYNC_CONCURRENCY", 32)
+    concurrency = max(1, min(requested or limit, limit))
+    output_dir = PlaywrightSnapService._generate_storage_dir()
+    return Response(_batch_lines(batch, concurrency, output_dir), mimetype="application/x-ndjson")
+
+
+def _batch_line(index, params, result=None, error=None):
+    line = {"index": index, "html_path": params and params["html_path"]}
+    if error is not None:
+        line.update({"code": 1, "msg": error})
+    else:
+        line.update({"code": 0, "task_token": params["task_token"], "data": result})
+    return dumps_bytes(line) + b"\n"
+
+
+def _batch_lines(batch, concurrency, output_dir):
+    """按完成顺序逐行输出结果，同时在途的任务不超过 concurrency"""
+    started = time.time()
+    pending = {}
+    succeeded = failed = 0
+    queue = list(enumerate(batch))
+    queue.reverse()
+
+    while queue or pending:
+        while queue and len(pending) < concurrency:
+            index, params = queue.pop()
+            if isinstance(params, str):
+                failed += 1
+                yield _batch_line(index, None, error=params)
+                continue
+            cache_key, cached = _cache_lookup(params)
+            if cached is not None:
+                _observe("cache", cached, 0)
+                succeeded += 1
+                yield _batch_line(index, params, result=cached)
+                continue
+            try:
+                future = async_snap_service.submit(
+                    params["html_path"], params["task_token"], params["element_ids"], output_dir, params["options"]
+                )
+            except AdmissionRejected as e:
+                failed += 1
+                yield _batch_line(index, params, error=str(e))
+                continue
+            pending[future] = (index, params, cache_key, time.time())
+        if not pending:
+            continue
+
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, params, cache_key, submitted = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                _observe("async", None, time.time() - submitted)
+                failed += 1
+                yield _batch_line(index, params, error=str(e))
+                continue
+            _observe("async", result, time.time() - submitted)
+            if cache_key:
+                snap_cache.put(cache_key, result)
+            if result["failed"]:
+                failed += 1
+            else:
+                succeeded += 1
+            yield _batch_line(index, params, result={k: v for k, v in result.items() if k != "images"})
+
+    yield dumps_bytes({
+        "done": True, "total": len(batch), "succeeded": succeeded, "failed": failed,
+        "dir": output_dir, "elapsed_ms": round((time.time() - started) * 1000)
+    }) + b"\n"
+
+
+def submit_job():
+    data = request.json or {}
+    try:
+        params = _parse_snap_params(data)
+        timeout = _number(data, "timeout", float)
+    except InvalidOption as e:
+        return _invalid(e)
+    if params is None:
         return jsonify({"code": 1, "msg": "html_path required"})
+    if not data.get("priority"):
+        # 异步任务默认走批量通道，不与交互请求争抢浏览器
+        params["options"]["priority"] = "batch"
+
+    try:
+        timeout = timeout or params["options"]["deadline_ms"] / 1000 or None
+        job = snap_job_queue.submit(params, timeout=timeout)
+    except QueueFullError as e:
+        return jsonify({"code": 1, "msg": str(e)}), 429
+    except AdmissionRejected as e:
+        return _rejected(e)
+
+    return jsonify({"code": 0, "data": job.to_dict()}), 202
+
+
+def job_status(job_id):
+    job = snap_job_queue.get(job_id)
+    if job is None:
+        return jsonify({"code": 1, "msg": "job not found"}), 404
+    return jsonify({"code": 0, "data": job.to_dict()})
+
+
+def job_result(job_id):
+    job = snap_job_queue.get(job_id)
+    if job is None:
+        return jsonify({"code": 1, "msg": "job not found"}), 404
+    if job.status in ("queued", "running"):
+        return jsonify({"code": 1, "msg": "job not finished", "data": job.to_dict()}), 202
+    if job.status != "done":
+        return jsonify({"code": 1, "msg": job.error, "data": job.to_dict()})
+    return _respond(job.params, job.result)
 
-    result = snap_service.capture_snap(
-        html_path=html_path,
-        task_token=task_token,
-        element_ids=element_ids
-    )
 
-    return jsonify({"code": 0, "data": result})
+def pool_stats():
+    return jsonify({"code": 0, "data": {
+        "pool": snap_service.pool_stats(),
+        "async": async_snap_service.stats(),
+        "fleet": snap_fleet.stats(),
+        "jobs": snap_job_queue.stats(),
+        "cache": snap_cache.stats(),
+        "coalescing": snap_flight.stats(),
+        "assets": asset_cache.stats(),
+        "fast_path": static_fast_path.stats()
+    }})
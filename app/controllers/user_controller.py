@@ -1,6 +1,8 @@
-from flask import request
+import json
+
+from flask import current_app, request
 from app.services.user_service import UserService
-from app.utils.response import success, error
+from app.utils.response import success, error, should_stream, success_stream
 
 def get_user(user_id):
     user = UserService.get_by_id(user_id)
@@ -8,6 +10,67 @@ def get_user(user_id):
         return error('用户不存在')
     return success(user.to_dict())
 
+def _iter_bulk_rows():
+    """
+    逐行读取批量数据：application/json 为 JSON 数组，其余按 NDJSON 从请求流中逐行解析，
+    产出 (序号, 数据)，解析失败的行产出 (序号, 异常)
+    """
+    if request.mimetype == 'application/json':
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            data = [ValueError('body must be a JSON array')]
+        yield from enumerate(data)
+        return
+    index = 0
+    for line in request.stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError as e:
+            yield index, e
+        index += 1
+
+def bulk_create_users():
+    result = UserService.bulk_create(
+        _iter_bulk_rows(), chunk_size=current_app.config.get('USER_BULK_CHUNK', 1000)
+    )
+    return success(result)
+
+def _parse_ids(values):
+    """id 必须是整数或整数字符串，返回 None 表示格式错误"""
+    ids = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            return None
+        try:
+            ids.append(int(value))
+        except ValueError:
+            return None
+    return ids
+
+def batch_get_users():
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('ids'), list):
+            return error('body must be an object with an ids list'), 400
+        ids = _parse_ids(data['ids'])
+    else:
+        ids = _parse_ids(i for i in request.args.get('ids', '').split(',') if i.strip())
+    if ids is None:
+        return error('ids must be integers'), 400
+    max_ids = current_app.config.get('USER_BATCH_MAX_IDS', 10000)
+    if len(ids) > max_ids:
+        return error(f'too many ids, max {max_ids}'), 400
+    users, missing = UserService.get_many(ids)
+    if should_stream(len(users)):
+        return success_stream({'users': users, 'missing': missing})
+    return success({'users': users, 'missing': missing})
+
+def cache_stats():
+    return success(UserService.cache_stats())
+
 def create_user():
     data = request.json or {}
     if not data.get('username'):
@@ -1,7 +1,9 @@
 from ..extensions import db
+from ..utils.serializer import SerializerMixin
 
-class User(db.Model):
+class User(SerializerMixin, db.Model):
     __tablename__ = 'users'
+    __serialize__ = ('id', 'username', 'email')
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), nullable=False)
     email = db.Column(db.String(128))
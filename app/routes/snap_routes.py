@@ -1,5 +1,17 @@
 from flask import Blueprint
-from app.controllers.snap_controller import snap
+from app.services.snap_loader import snap_loader
+from app.utils.lazy import LazyView
+
+
+def _view(name):
+    # 截图视图延迟导入：第一次请求时才加载 snap_controller 并初始化截图服务
+    return LazyView(f'app.controllers.snap_controller.{name}', loader=snap_loader.load)
+
 
 snap_bp = Blueprint('snap', __name__)
-snap_bp.route('/snap', methods=['POST', 'GET'])(snap)
\ No newline at end of file
+snap_bp.route('/snap', methods=['POST', 'GET'])(_view('snap'))
+snap_bp.route('/batch', methods=['POST'])(_view('batch_snap'))
+snap_bp.route('/pool/stats', methods=['GET'])(_view('pool_stats'))
+snap_bp.route('/jobs', methods=['POST'])(_view('submit_job'))
+snap_bp.route('/jobs/<job_id>', methods=['GET'])(_view('job_status'))
+snap_bp.route('/jobs/<job_id>/result', methods=['GET'])(_view('job_result'))
@@ -1,6 +1,11 @@
 from flask import Blueprint
-from app.controllers.user_controller import get_user, create_user
+from app.controllers.user_controller import (
+    get_user, create_user, bulk_create_users, batch_get_users, cache_stats
+)
 
 user_bp = Blueprint('user', __name__)
 user_bp.route('/<int:user_id>', methods=['GET'])(get_user)
 user_bp.route('/', methods=['POST'])(create_user)
+user_bp.route('/bulk', methods=['POST'])(bulk_create_users)
+user_bp.route('/batch', methods=['GET', 'POST'])(batch_get_users)
+user_bp.route('/cache/stats', methods=['GET'])(cache_stats)
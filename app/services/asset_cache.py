@@ -0,0 +1,303 @@
+"""
+截图页面共用的 HTTP 静态资源缓存：由 page.route 查询，所有 BrowserContext 共享。
+资源体按 sha256 存放在磁盘（相同内容只存一份），按 Cache-Control / Expires 判断新鲜度，
+过期但带 ETag / Last-Modified 的条目用条件请求重新验证，按总字节数做 LRU 淘汰。
+"""
+import atexit
+import email.utils
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app.utils.cache_index import PersistentIndexMixin
+
+# 会被缓存的资源类型，页面本身与 XHR 等动态请求不缓存
+CACHEABLE_TYPES = ("stylesheet", "script", "font", "image")
+# 响应体已解码，这些头不能原样返回给浏览器
+_DROP_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie")
+# 只有 Last-Modified 时的启发式新鲜期上限（秒）
+_HEURISTIC_MAX_AGE = 86400
+
+
+def _parse_cache_control(value):
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"')
+    return directives
+
+
+def _parse_date(value):
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness(headers, now=None):
+    """
+    :param headers: 响应头（小写键）
+    :return: 新鲜期（秒），不可缓存时返回 None；0 表示每次使用前都要重新验证
+    """
+    now = now or time.time()
+    directives = _parse_cache_control(headers.get("cache-control"))
+    if "no-store" in directives or "private" in directives:
+        return None
+    validators = headers.get("etag") or headers.get("last-modified")
+    if "no-cache" in directives:
+        return 0 if validators else None
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return max(0, int(directives[name]))
+            except ValueError:
+                return None
+    expires = _parse_date(headers.get("expires"))
+    if expires is not None:
+        return max(0, expires - now)
+    modified = _parse_date(headers.get("last-modified"))
+    if modified is not None:
+        return min(_HEURISTIC_MAX_AGE, max(0, (now - modified) / 10))
+    return None
+
+
+class AssetCache(PersistentIndexMixin):
+    """
+    内存中保存 URL -> 条目的 LRU 索引（定期落盘），资源体按内容寻址保存在 root/xx/sha256。
+    多个进程可共用同一个 root，各自使用独立的索引文件，读取时资源体缺失按未命中处理。
+    """
+
+    def __init__(self, root="app/static/storage/assets", max_bytes=256 * 1024 * 1024, index_name="index.json"):
+        """
+        :param root: 资源体与索引所在目录
+        :param max_bytes: 资源体总字节数上限，0 表示不启用缓存
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_name = index_name
+        self._entries = None
+        self._refs = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "uncacheable": 0,
+            "evictions": 0, "bytes_saved": 0
+        }
+
+    _index_label = "资源缓存索引"
+
+    def init_app(self, app):
+        self.configure(
+            root=app.config.get("SNAP_ASSET_CACHE_DIR", self.root),
+            max_bytes=app.config.get("SNAP_ASSET_CACHE_MAX_BYTES", self.max_bytes)
+        )
+        atexit.register(self.flush)
+        app.extensions["snap_asset_cache"] = self
+
+    def configure(self, root=None, max_bytes=None, index_name=None):
+        with self._lock:
+            if self._entries is not None:
+                self._save(force=True)
+            self.root = root or self.root
+            self.max_bytes = self.max_bytes if max_bytes is None else max_bytes
+            self.index_name = index_name or self.index_name
+            self._entries = None
+            self._refs = {}
+            self._bytes = 0
+
+    def settings(self):
+        return {"root": self.root, "max_bytes": self.max_bytes}
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @property
+    def index_path(self):
+        return os.path.join(self.root, self.index_name)
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    # ---------------------- 读写 ----------------------
+    def lookup(self, url):
+        """
+        :return: (条目, 是否新鲜)，未命中时条目为 None
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(url)
+            if entry is not None and not os.path.exists(self._blob_path(entry["digest"])):
+                self._evict(url)
+                entry = None
+            if entry is None:
+                return None, False
+            self._entries.move_to_end(url)
+            return dict(entry), time.time() < entry["expires"]
+
+    def read(self, entry, revalidated=False):
+        """读取条目的资源体并计为命中"""
+        try:
+            with open(self._blob_path(entry["digest"]), "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["bytes_saved"] += len(body)
+            if revalidated:
+                self._stats["revalidated"] += 1
+        return body
+
+    def refresh(self, url, headers):
+        """条件请求返回 304 后按新的响应头延长新鲜期"""
+        with self._lock:
+            entry = self._entries.get(url) if self._entries is not None else None
+            if entry is None:
+                return
+            ttl = freshness({**entry["headers"], **headers})
+            entry["expires"] = time.time() + (ttl or 0)
+            self._save()
+
+    def store(self, url, status, headers, body):
+        """缓存一个 200 响应，不可缓存或超过总预算的响应忽略"""
+        headers = {k.lower(): v for k, v in headers.items()}
+        ttl = freshness(headers) if status == 200 else None
+        if ttl is None or len(body) > self.max_bytes:
+            with self._lock:
+                self._stats["misses"] += 1
+                self._stats["uncacheable"] += 1
+            return
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"[WARN] 写入资源缓存失败: {url}, {e}")
+                return
+        kept = {k: v for k, v in headers.items() if k not in _DROP_HEADERS}
+        with self._lock:
+            self._load()
+            old = self._entries.pop(url, None)
+            self._entries[url] = {
+                "digest": digest,
+                "size": len(body),
+                "status": status,
+                "headers": kept,
+                "expires": time.time() + ttl
+            }
+            self._add_ref(digest, len(body))
+            if old is not None:
+                # 先引用新资源体再释放旧的，内容未变时不会误删文件
+                self._release(old)
+            self._stats["misses"] += 1
+            self._stats["stores"] += 1
+            self._shrink()
+            self._save()
+
+    # ---------------------- page.route 处理 ----------------------
+    def _cacheable(self, request):
+        return self.enabled and request.method == "GET" and request.resource_type in CACHEABLE_TYPES
+
+    @staticmethod
+    def _conditional_headers(request, entry):
+        headers = dict(request.headers)
+        if entry["headers"].get("etag"):
+            headers["if-none-match"] = entry["headers"]["etag"]
+        if entry["headers"].get("last-modified"):
+            headers["if-modified-since"] = entry["headers"]["last-modified"]
+        return headers
+
+    def handle(self, route, request):
+        """
+        同步 API 的 route 处理：命中则直接返回缓存，否则代为请求并写入缓存
+        :return: 已处理返回 True，不适用缓存返回 False（由调用方放行）
+        """
+        if not self._cacheable(request):
+            return False
+        entry, fresh = self.lookup(request.url)
+        if entry is not None and fresh:
+            body = self.read(entry)
+            if body is not None:
+                route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+                return True
+        if entry is not None:
+            response = route.fetch(headers=self._conditional_headers(request, entry))
+            if response.status == 304:
+                self.refresh(request.url, response.headers)
+                body = self.read(entry, revalidated=True)
+                if body is not None:
+                    route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+                    return True
+                response = route.fetch()
+        else:
+            response = route.fetch()
+        body = response.body()
+        self.store(request.url, response.status, response.headers, body)
+        route.fulfill(response=response, body=body)
+        return True
+
+    async def handle_async(self, route, request):
+        """异步 API 的 route 处理，逻辑同 handle"""
+        if not self._cacheable(request):
+            return False
+        entry, fresh = self.lookup(request.url)
+        if entry is not None and fresh:
+            body = self.read(entry)
+            if body is not None:
+                await route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+                return True
+        if entry is not None:
+            response = await route.fetch(headers=self._conditional_headers(request, entry))
+            if response.status == 304:
+                self.refresh(request.url, response.headers)
+                body = self.read(entry, revalidated=True)
+                if body is not None:
+                    await route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+                    return True
+                response = await route.fetch()
+        else:
+            response = await route.fetch()
+        body = await response.body()
+        self.store(request.url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+        return True
+
+    # ---------------------- 淘汰与持久化 ----------------------
+    def _add_ref(self, digest, size):
+        if digest not in self._refs:
+            self._bytes += size
+        self._refs[digest] = self._refs.get(digest, 0) + 1
+
+    def _release(self, entry):
+        """资源体不再被任何 URL 引用时删除文件"""
+        digest = entry["digest"]
+        self._refs[digest] = self._refs.get(digest, 1) - 1
+        if self._refs[digest] <= 0:
+            del self._refs[digest]
+            self._bytes -= entry["size"]
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    def _evict(self, url):
+        self._release(self._entries.pop(url))
+        self._stats["evictions"] += 1
+
+    def _shrink(self):
+        while self._entries and self._bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _index_loaded(self, url, entry):
+        self._add_ref(entry["digest"], entry["size"])
+
+asset_cache = AssetCache()
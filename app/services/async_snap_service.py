@@ -0,0 +1,316 @@
+import asyncio
+import io
+import random
+import string
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from playwright.async_api import async_playwright
+
+from app.services.browser_pool import LAUNCH_ARGS, CONTEXT_OPTIONS
+from app.services.element_batch import (
+    Image, ALL_PRESENT_JS, ELEMENT_RECTS_JS, LAZY_TARGETS_JS, crop_regions, group_clips
+)
+from app.services.snap_options import normalize_options
+from app.services.scheduling import (
+    AdmissionRejected, AsyncDeadlineGate, DeadlineExceeded, ServiceTimeEstimator, resolve_deadline
+)
+from app.services.page_readiness import wait_until_ready_async, record_wait
+from app.services.scroll_driver import scroll_page_async
+from app.services.snap_service import PlaywrightSnapService
+from app.services.snap_storage import store_image, finish_encoding
+from app.services.request_router import request_router
+from app.services import static_fast_path
+from app.services import image_encoding, tiled_capture
+
+
+class AsyncPlaywrightSnapService:
+    """
+    基于 playwright.async_api 的截图引擎：
+    所有任务在一个后台事件循环中共享同一个浏览器，并发闸门限制同时在途的页面数，
+    等待期间不占用 Flask 工作线程之外的任何线程。
+    与浏览器池相同的调度规则：名额按截止时间最早优先分配，提交时预计超时的任务直接拒绝，
+    拿到名额时已过期的任务以 DeadlineExceeded 结束
+    """
+
+    def __init__(self, concurrency=16):
+        self.concurrency = concurrency
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._browser_lock = None
+        self._gate = None
+        self._estimator = ServiceTimeEstimator()
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0, "in_flight": 0, "completed": 0, "launches": 0, "rejected": 0, "expired": 0
+        }
+
+    def init_app(self, app):
+        self.concurrency = app.config.get("SNAP_ASYNC_CONCURRENCY", self.concurrency)
+        app.extensions["async_snap_service"] = self
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._gate = AsyncDeadlineGate(self.concurrency)
+                self._browser_lock = asyncio.Lock()
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name="async-snap-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    def warmup(self):
+        """启动事件循环并在后台启动浏览器，不等待启动完成"""
+        def report(future):
+            if not future.cancelled() and future.exception() is not None:
+                print(f"[WARN] async 预热启动浏览器失败: {future.exception()}")
+
+        asyncio.run_coroutine_threadsafe(self._get_browser(), self._ensure_loop()).add_done_callback(report)
+
+    async def _get_browser(self):
+        async with self._browser_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+            self._stats["launches"] += 1
+            return self._browser
+
+    def submit(self, html_path: str, task_token: str, element_ids: list = None, output_dir: str = None,
+               options: dict = None, timeout: float = None):
+        """
+        投递截图任务到事件循环，options 中的 priority / deadline_ms 决定通道与截止时间
+        :param timeout: 调用方等待结果的最长时间（秒），与通道时限一起决定截止时间
+        :raises AdmissionRejected: 按当前排队情况预计无法在截止时间前完成
+        :return: concurrent.futures.Future，结果与 capture_snap 相同
+        """
+        loop = self._ensure_loop()
+        options = normalize_options(options)
+        deadline = resolve_deadline(options["priority"], options["deadline_ms"], timeout)
+        finish = self._estimator.estimate_finish(
+            self._gate.ahead_of(deadline), self._gate.busy, self.concurrency
+        )
+        if finish is not None and finish > deadline:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise AdmissionRejected(
+                f"预计 {finish - time.time():.1f}s 后才能完成，超过截止时间",
+                retry_after=max(1, int(finish - deadline) + 1)
+            )
+        with self._lock:
+            self._stats["submitted"] += 1
+        coro = self.capture_snap_async(html_path, task_token, element_ids, output_dir, options, deadline)
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def capture_snap(self, html_path: str, task_token: str, element_ids: list = None, timeout: float = None,
+                     options: dict = None, output_dir: str = None):
+        """同步接口，签名与 PlaywrightSnapService.capture_snap 保持一致；超时后取消协程，释放并发名额与页面"""
+        future = self.submit(html_path, task_token, element_ids, output_dir, options, timeout)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    async def capture_snap_async(self, html_path, task_token, element_ids=None, output_dir=None, options=None,
+                                 deadline=None):
+        """
+        :param html_path: HTML 文件路径或 URL
+        :param task_token: 任务唯一标识，用于生成文件名
+        :param element_ids: 需要截图的元素 id 列表，默认空则截图全页
+        :param output_dir: 输出目录，默认按日期生成
+        :param options: 可选参数，见 snap_options.DEFAULT_OPTIONS
+        :param deadline: 绝对截止时间，默认按通道时限计算
+        :return: dict 包含 success 与 failed，同时返回截图目录
+        """
+        element_ids = element_ids or []
+        options = normalize_options(options)
+        output_dir = output_dir or PlaywrightSnapService._generate_storage_dir()
+        rand_str = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
+
+        if deadline is None:
+            deadline = resolve_deadline(options["priority"], options["deadline_ms"])
+        await self._gate.acquire(deadline, options["priority"])
+        if time.time() > deadline:
+            # 不抢占执行中的任务，但已过期的任务不再占用页面
+            self._gate.release()
+            self._stats["expired"] += 1
+            raise DeadlineExceeded("任务在开始前已超过截止时间")
+        started = time.perf_counter()
+        self._stats["in_flight"] += 1
+        try:
+            browser = await self._get_browser()
+            context = await browser.new_context(**CONTEXT_OPTIONS)
+            try:
+                result = await self._capture_in_context(
+                    context, html_path, task_token, element_ids, output_dir, rand_str, options
+                )
+            finally:
+                await context.close()
+        finally:
+            self._stats["in_flight"] -= 1
+            self._stats["completed"] += 1
+            self._gate.release()
+            self._estimator.observe(time.perf_counter() - started)
+
+        # 编码在页面释放后等待，不占用并发名额
+        if result.get("_encoding"):
+            await asyncio.get_running_loop().run_in_executor(None, finish_encoding, result, options)
+        return result
+
+    async def _capture_in_context(self, context, html_path, task_token, element_ids, output_dir, rand_str, options):
+        result = {"success": [], "failed": [], "dir": output_dir}
+        if request_router.needed(options):
+            await context.route("**/*", request_router.async_handler(options))
+        page = await context.new_page()
+
+        fast = static_fast_path.use_fast_path(html_path, options)
+
+        # 打开页面
+        try:
+            if fast:
+                await page.set_content(static_fast_path.read_html(html_path), wait_until="load")
+            elif html_path.startswith("http"):
+                await page.goto(html_path, wait_until="networkidle")
+            else:
+                await page.goto(f"file:///{html_path}", wait_until="load")
+        except Exception as e:
+            result["failed"].append({"id": "page_load", "error": f"页面加载失败: {str(e)}"})
+            return result
+
+        if fast:
+            # 自包含的静态页面加载完成即可截图，跳过就绪等待与滚动
+            result["fast_path"] = True
+        else:
+            # 等待页面就绪，全屏截图时在页面内滚动一遍触发懒加载
+            record_wait(result, await wait_until_ready_async(
+                page, max_ms=options["ready_max_ms"], quiet_ms=options["ready_quiet_ms"]
+            ))
+            try:
+                if not element_ids:
+                    result["scroll"] = await scroll_page_async(
+                        page, step=options["scroll_step"], max_ms=options["scroll_max_ms"]
+                    )
+            except Exception as e:
+                print(f"等待懒加载失败（不影响继续）: {e}")
+
+        if element_ids and options["batch"] and Image is not None:
+            await self._capture_elements_batch(page, element_ids, task_token, rand_str, output_dir, result, options)
+        elif element_ids:
+            for element_id in element_ids:
+                try:
+                    element = await page.wait_for_selector(f"#{element_id}", timeout=15000, state="visible")
+                    filename = f"{element_id}{task_token}{rand_str}.png"
+                    data = await element.screenshot(timeout=5000, **image_encoding.screenshot_kwargs(options))
+                    if image_encoding.is_valid(data, "element"):
+                        store_image(result, element_id, data, output_dir, filename, options)
+                    else:
+                        result["failed"].append(
+                            {"id": element_id, "error": "Screenshot file is empty or too small"})
+                except Exception as e:
+                    result["failed"].append({"id": element_id, "error": str(e)})
+        else:
+            try:
+                filename = f"fullpage{task_token}{rand_str}.png"
+                if options["tiled"] and tiled_capture.Image is not None:
+                    buf = io.BytesIO()
+                    result["tiles"] = await tiled_capture.capture_tiled_async(
+                        page, buf, tile_height=options["tile_height"], max_height=options["tiled_max_height"]
+                    )
+                    data = buf.getvalue()
+                else:
+                    data = await page.screenshot(
+                        full_page=True, timeout=10000, **image_encoding.screenshot_kwargs(options)
+                    )
+                if image_encoding.is_valid(data, "full_page"):
+                    store_image(result, "full_page", data, output_dir, filename, options)
+                else:
+                    result["failed"].append(
+                        {"id": "full_page", "error": "Screenshot file is empty or too small"})
+            except Exception as e:
+                result["failed"].append({"id": "full_page", "error": str(e)})
+
+        return result
+
+    async def _capture_elements_batch(self, page, element_ids, task_token, rand_str, output_dir, result, options):
+        """批量元素截图：一次取得所有元素位置，按 tile_height 分组截图，在线程池中裁剪编码"""
+        try:
+            await page.wait_for_function(ALL_PRESENT_JS, arg=element_ids, timeout=15000)
+        except Exception as e:
+            print(f"部分元素未出现，继续截取已存在的元素: {e}")
+        try:
+            await page.evaluate(LAZY_TARGETS_JS, {"ids": element_ids, "maxMs": options["scroll_max_ms"]})
+        except Exception as e:
+            print(f"等待懒加载失败（不影响继续）: {e}")
+
+        targets = []
+        for rect in await page.evaluate(ELEMENT_RECTS_JS, element_ids):
+            if not rect["found"]:
+                result["failed"].append({"id": rect["id"], "error": "Element not found"})
+            elif not rect["visible"]:
+                result["failed"].append({"id": rect["id"], "error": "Element not visible"})
+            else:
+                targets.append(rect)
+        if not targets:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+            crops = {}
+            for clip, members in group_clips(targets, options["tile_height"]):
+                image = await page.screenshot(full_page=True, clip=clip, scale="css", timeout=10000)
+                crops.update(await loop.run_in_executor(None, crop_regions, image, clip, members))
+        except Exception as e:
+            for rect in targets:
+                result["failed"].append({"id": rect["id"], "error": str(e)})
+            return
+
+        for rect in targets:
+            element_id = rect["id"]
+            data = crops.get(element_id) or b""
+            if not image_encoding.is_valid(data, "element"):
+                result["failed"].append({"id": element_id, "error": "Screenshot file is empty or too small"})
+                continue
+            filename = f"{element_id}{task_token}{rand_str}.png"
+            store_image(result, element_id, data, output_dir, filename, options)
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["concurrency"] = self.concurrency
+        stats["queued"] = self._gate.waiting() if self._gate is not None else 0
+        stats["est_task_seconds"] = self._estimator.average
+        return stats
+
+    def shutdown(self, timeout=10):
+        """关闭浏览器并停止事件循环"""
+        if self._loop is None:
+            return
+
+        async def close():
+            if self._browser is not None:
+                await self._browser.close()
+            if self._playwright is not None:
+                await self._playwright.stop()
+            self._browser = self._playwright = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(close(), self._loop).result(timeout)
+        except Exception as e:
+            print(f"[WARN] async snap shutdown failed: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop = None
@@ -0,0 +1,364 @@
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from playwright.sync_api import sync_playwright
+
+from app.services.scheduling import (
+    AdmissionRejected, DeadlineExceeded, DeadlineQueue, ServiceTimeEstimator, lane_of, resolve_deadline
+)
+
+try:
+    import psutil
+except ImportError:  # psutil 为可选依赖，缺失时不按内存回收
+    psutil = None
+
+LAUNCH_ARGS = [
+    "--no-sandbox",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-features=IsolateOrigins,site-per-process",
+    "--start-maximized"
+]
+
+CONTEXT_OPTIONS = {
+    "viewport": {"width": 1920, "height": 1080},
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/114.0.0.0 Safari/537.36",
+    "java_script_enabled": True
+}
+
+# 复用页面在任务之间的重置：清空当前源的存储，导航到空白页
+_CLEAR_STORAGE_JS = "() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }"
+
+# 启动 playwright driver 时需要比对子进程，串行化避免多个槽位互相干扰
+_driver_start_lock = threading.Lock()
+
+
+class _BrowserSlot(threading.Thread):
+    """
+    池中的一个槽位：独占一个线程、一个 playwright driver 和一个常驻浏览器。
+    sync_playwright 的对象只能在创建它的线程中使用，所以任务会被投递到槽位线程执行。
+    """
+
+    def __init__(self, pool, index):
+        super().__init__(name=f"browser-slot-{index}", daemon=True)
+        self.pool = pool
+        self.index = index
+        self.playwright = None
+        self.driver_process = None
+        self.browser = None
+        self.uses = 0
+        # 页面复用：profile 键 -> {"context", "page", "uses"}
+        self._pages = {}
+
+    def run(self):
+        if self.pool._prelaunch:
+            try:
+                self._ensure_browser()
+            except Exception as e:
+                print(f"[WARN] {self.name} 预热启动浏览器失败: {e}")
+        while True:
+            task = self.pool._tasks.get()
+            if task is None:
+                break
+            future, fn, args, kwargs, context_options, deadline = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            if time.time() > deadline:
+                # 不抢占执行中的任务，但已过期的任务不再占用浏览器
+                self.pool._incr("expired")
+                future.set_exception(DeadlineExceeded("任务在开始前已超过截止时间"))
+                continue
+            self.pool._incr("running")
+            started = time.perf_counter()
+            try:
+                future.set_result(self._execute(fn, args, kwargs, context_options))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self.pool._incr("running", -1)
+                self.pool._estimator.observe(time.perf_counter() - started)
+        self._close_browser()
+        self._stop_driver()
+
+    def _execute(self, fn, args, kwargs, context_options):
+        self._ensure_browser()
+        options = dict(CONTEXT_OPTIONS)
+        options.update(context_options or {})
+        if self.pool.page_max_uses:
+            return self._execute_reused(fn, args, kwargs, options)
+        context = self.browser.new_context(**options)
+        try:
+            return fn(context, *args, **kwargs)
+        finally:
+            self._close_context(context)
+            self.uses += 1
+            self._maybe_recycle()
+
+    def _execute_reused(self, fn, args, kwargs, options):
+        """
+        页面复用：按 (viewport, UA, JS 开关) 保留预热好的 context 与 page，任务结束后重置状态放回；
+        任务失败、重置失败或复用次数达到上限时关闭
+        """
+        key = json.dumps(
+            [options.get("viewport"), options.get("user_agent"), options.get("java_script_enabled")],
+            sort_keys=True
+        )
+        entry = self._pages.pop(key, None)
+        if entry is not None and entry["page"].is_closed():
+            self._close_context(entry["context"])
+            entry = None
+        if entry is None:
+            context = self.browser.new_context(**options)
+            entry = {"context": context, "page": context.new_page(), "uses": 0}
+            self.pool._incr("page_creates")
+        else:
+            self.pool._incr("page_reuses")
+
+        ok = False
+        try:
+            result = fn(entry["context"], *args, page=entry["page"], **kwargs)
+            ok = True
+            return result
+        finally:
+            entry["uses"] += 1
+            self.uses += 1
+            if ok and entry["uses"] < self.pool.page_max_uses and self._reset_page(entry, options):
+                self._pages[key] = entry
+            else:
+                self._close_context(entry["context"])
+            self._maybe_recycle()
+
+    @staticmethod
+    def _reset_page(entry, options):
+        """清除路由、存储、cookie 与权限，关闭弹出的页面，导航到 about:blank 并恢复视口"""
+        context, page = entry["context"], entry["page"]
+        try:
+            page.unroute_all(behavior="ignoreErrors")
+            for other in context.pages:
+                if other is not page:
+                    other.close()
+            page.evaluate(_CLEAR_STORAGE_JS)
+            page.goto("about:blank")
+            context.clear_cookies()
+            context.clear_permissions()
+            if options.get("viewport"):
+                page.set_viewport_size(options["viewport"])
+            return True
+        except Exception as e:
+            print(f"[WARN] 复用页面重置失败，关闭: {e}")
+            return False
+
+    @staticmethod
+    def _close_context(context):
+        try:
+            context.close()
+        except Exception as e:
+            print(f"[WARN] context close failed: {e}")
+
+    def _ensure_browser(self):
+        """健康检查：浏览器存在且连接正常则复用，否则重新启动"""
+        if self.browser is not None:
+            if self.browser.is_connected():
+                self.pool._incr("hits")
+                return
+            print(f"[WARN] {self.name} 浏览器已断开，重新启动")
+            self.pool._incr("health_failures")
+            self._close_browser()
+
+        if self.playwright is None:
+            self._start_driver()
+        self.browser = self.playwright.chromium.launch(
+            headless=True,
+            args=self.pool.launch_args
+        )
+        self.uses = 0
+        self.pool._incr("launches")
+
+    def _start_driver(self):
+        with _driver_start_lock:
+            before = self._child_pids()
+            self.playwright = sync_playwright().start()
+            new_pids = self._child_pids() - before
+        if psutil is not None and len(new_pids) == 1:
+            self.driver_process = psutil.Process(new_pids.pop())
+
+    def _stop_driver(self):
+        if self.playwright is not None:
+            try:
+                self.playwright.stop()
+            except Exception as e:
+                print(f"[WARN] playwright stop failed: {e}")
+        self.playwright = None
+        self.driver_process = None
+
+    def _close_browser(self):
+        # 复用的页面随浏览器一起关闭
+        self._pages = {}
+        if self.browser is not None:
+            try:
+                self.browser.close()
+            except Exception as e:
+                print(f"[WARN] browser close failed: {e}")
+        self.browser = None
+
+    @staticmethod
+    def _child_pids():
+        if psutil is None:
+            return set()
+        return {c.pid for c in psutil.Process(os.getpid()).children()}
+
+    def rss_mb(self):
+        """当前槽位浏览器进程树的常驻内存（MB），无法统计时返回 0"""
+        if self.driver_process is None:
+            return 0
+        total = 0
+        try:
+            for proc in self.driver_process.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+        except psutil.Error:
+            return 0
+        return total / (1024 * 1024)
+
+    def _maybe_recycle(self):
+        """使用次数或内存超限时关闭浏览器，下次任务时重新启动"""
+        reason = None
+        if self.pool.max_uses and self.uses >= self.pool.max_uses:
+            reason = f"uses={self.uses}"
+        elif self.pool.max_rss_mb:
+            rss = self.rss_mb()
+            if rss > self.pool.max_rss_mb:
+                reason = f"rss={rss:.0f}MB"
+        if reason:
+            print(f"{self.name} 回收浏览器: {reason}")
+            self._close_browser()
+            self.pool._incr("recycles")
+
+
+class BrowserPool:
+    """
+    常驻 Chromium 浏览器池：浏览器启动成本每个槽位只付一次，每个任务拿到一个全新的 BrowserContext；
+    开启页面复用时改为复用重置过状态的预热页面
+    """
+
+    def __init__(self, size=2, max_uses=200, max_rss_mb=0, launch_args=None, page_max_uses=0):
+        """
+        :param size: 槽位数（常驻浏览器数量）
+        :param max_uses: 单个浏览器最多服务的任务数，超过后回收，0 表示不限
+        :param max_rss_mb: 单个浏览器进程树内存上限（MB），超过后回收，0 表示不限
+        :param launch_args: Chromium 启动参数
+        :param page_max_uses: 单个复用页面最多服务的任务数，0 表示不复用页面（每个任务新建 context）
+        """
+        self.size = max(1, int(size))
+        self.max_uses = int(max_uses or 0)
+        self.max_rss_mb = float(max_rss_mb or 0)
+        self.page_max_uses = int(page_max_uses or 0)
+        self.launch_args = launch_args or LAUNCH_ARGS
+        self._tasks = DeadlineQueue()
+        self._estimator = ServiceTimeEstimator()
+        self._prelaunch = False
+        self._slots = []
+        self._lock = threading.Lock()
+        self._stats = {
+            "tasks": 0, "hits": 0, "launches": 0, "recycles": 0, "health_failures": 0,
+            "page_creates": 0, "page_reuses": 0, "running": 0, "rejected": 0, "expired": 0
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            size=config.get("SNAP_POOL_SIZE", 2),
+            max_uses=config.get("SNAP_POOL_MAX_USES", 200),
+            max_rss_mb=config.get("SNAP_POOL_MAX_RSS_MB", 0),
+            page_max_uses=config.get("SNAP_POOL_PAGE_MAX_USES", 0)
+        )
+
+    def _incr(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._slots:
+                return
+            for i in range(self.size):
+                slot = _BrowserSlot(self, i)
+                slot.start()
+                self._slots.append(slot)
+
+    def warmup(self):
+        """启动所有槽位并立即启动浏览器，不等第一个任务到来"""
+        self._prelaunch = True
+        self._ensure_started()
+
+    def submit(self, fn, *args, context_options=None, priority=None, deadline=None, **kwargs):
+        """
+        投递任务，由空闲槽位在新建的 BrowserContext 中执行 fn(context, *args, **kwargs)；
+        开启页面复用时执行 fn(context, *args, page=复用的页面, **kwargs)。
+        任务按截止时间最早优先出队，出队时已过期的任务以 DeadlineExceeded 结束。
+        :param priority: 通道 interactive / batch / background
+        :param deadline: 绝对截止时间，默认按通道时限计算
+        :raises AdmissionRejected: 按当前排队情况预计无法在截止时间前完成
+        :return: concurrent.futures.Future
+        """
+        self._ensure_started()
+        lane = lane_of(priority)
+        deadline = deadline or resolve_deadline(lane)
+        with self._lock:
+            running = self._stats["running"]
+        finish = self._estimator.estimate_finish(self._tasks.ahead_of(deadline), running, self.size)
+        if finish is not None and finish > deadline:
+            self._incr("rejected")
+            raise AdmissionRejected(
+                f"预计 {finish - time.time():.1f}s 后才能完成，超过截止时间",
+                retry_after=max(1, math.ceil(finish - deadline))
+            )
+        future = Future()
+        self._incr("tasks")
+        self._tasks.put((future, fn, args, kwargs, context_options, deadline), deadline, lane)
+        return future
+
+    def run(self, fn, *args, timeout=None, context_options=None, priority=None, deadline=None, **kwargs):
+        """同步执行任务并返回结果"""
+        return self.submit(
+            fn, *args, context_options=context_options, priority=priority, deadline=deadline, **kwargs
+        ).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            slots = list(self._slots)
+        stats["size"] = self.size
+        stats["queued"] = self._tasks.qsize()
+        average = self._estimator.average
+        stats["est_task_seconds"] = round(average, 3) if average is not None else None
+        stats["slots"] = [
+            {
+                "name": s.name,
+                "alive": s.is_alive(),
+                "browser": s.browser is not None,
+                "uses": s.uses,
+                "pages": len(s._pages),
+                "rss_mb": round(s.rss_mb(), 1)
+            }
+            for s in slots
+        ]
+        return stats
+
+    def shutdown(self, timeout=10):
+        """关闭所有槽位与浏览器"""
+        with self._lock:
+            slots, self._slots = self._slots, []
+        for _ in slots:
+            self._tasks.put(None)
+        for slot in slots:
+            slot.join(timeout)
@@ -0,0 +1,127 @@
+import io
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 为可选依赖，缺失时退化为按元素区域逐个截图
+    Image = None
+
+# 所有元素都已出现在 DOM 中
+ALL_PRESENT_JS = "(ids) => ids.every(id => document.getElementById(id))"
+
+# 一次性取得所有元素的可见性与页面坐标（相对文档左上角）
+ELEMENT_RECTS_JS = """
+    (ids) => ids.map(id => {
+        const el = document.getElementById(id);
+        if (!el) return {id, found: false, visible: false};
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        const visible = style.display !== 'none' &&
+                        style.visibility !== 'hidden' &&
+                        style.opacity !== '0' &&
+                        el.offsetWidth > 0 &&
+                        el.offsetHeight > 0;
+        return {
+            id, found: true, visible,
+            x: rect.left + window.scrollX,
+            y: rect.top + window.scrollY,
+            width: rect.width,
+            height: rect.height
+        };
+    })
+"""
+
+# 把包含懒加载内容的目标元素依次滚动到视口内并等待其图片加载（总时长不超过 maxMs），最后回到顶部；
+# 不含懒加载内容的元素不滚动
+LAZY_TARGETS_JS = """
+    async ({ids, maxMs}) => {
+        const start = performance.now();
+        const frame = () => new Promise(resolve => requestAnimationFrame(() => resolve()));
+        const selector = 'img[loading=lazy], img[data-src], img[data-srcset], iframe[loading=lazy]';
+        let scrolled = 0;
+        for (const id of ids) {
+            const el = document.getElementById(id);
+            if (!el) continue;
+            const lazy = el.matches(selector) ? [el] : Array.from(el.querySelectorAll(selector));
+            if (!lazy.length) continue;
+            const remaining = maxMs - (performance.now() - start);
+            if (remaining <= 0) break;
+            el.scrollIntoView({block: 'center', behavior: 'instant'});
+            scrolled++;
+            await frame();
+            const pending = lazy.filter(node => node.tagName === 'IMG' && !node.complete);
+            await Promise.race([
+                Promise.all(pending.map(img => new Promise(resolve => {
+                    img.addEventListener('load', resolve, {once: true});
+                    img.addEventListener('error', resolve, {once: true});
+                }))),
+                new Promise(resolve => setTimeout(resolve, remaining))
+            ]);
+        }
+        if (scrolled) {
+            window.scrollTo({top: 0, behavior: 'instant'});
+            await frame();
+        }
+        return scrolled;
+    }
+"""
+
+
+def to_box(rect):
+    """元素坐标取整为像素框 (left, top, right, bottom)"""
+    return (
+        max(0, math.floor(rect["x"])),
+        max(0, math.floor(rect["y"])),
+        math.ceil(rect["x"] + rect["width"]),
+        math.ceil(rect["y"] + rect["height"])
+    )
+
+
+def to_clip(box):
+    left, top, right, bottom = box
+    return {"x": left, "y": top, "width": right - left, "height": bottom - top}
+
+
+def group_clips(rects, max_height):
+    """
+    按纵向位置把元素分组，每组覆盖区域的高度不超过 max_height（本身更高的元素单独成组），
+    相距很远的元素不会合并成一张整页大小的截图
+    :return: [(clip, rects)]
+    """
+    groups = []
+    for rect in sorted(rects, key=lambda r: to_box(r)[1]):
+        box = to_box(rect)
+        if groups:
+            group_box, members = groups[-1]
+            merged = (
+                min(group_box[0], box[0]), group_box[1],
+                max(group_box[2], box[2]), max(group_box[3], box[3])
+            )
+            if merged[3] - merged[1] <= max_height:
+                groups[-1] = (merged, members + [rect])
+                continue
+        groups.append((box, [rect]))
+    return [(to_clip(box), members) for box, members in groups]
+
+
+def crop_regions(image_bytes, clip, rects, workers=4):
+    """
+    从一张截图中裁剪出各元素并并行编码为 PNG
+    :param image_bytes: 覆盖 clip 区域的截图
+    :param clip: 截图区域，元素坐标需减去其左上角
+    :param rects: ELEMENT_RECTS_JS 返回的元素坐标
+    :return: dict 元素 id -> PNG 字节
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    image.load()
+
+    def encode(rect):
+        left, top, right, bottom = to_box(rect)
+        box = (left - clip["x"], top - clip["y"], right - clip["x"], bottom - clip["y"])
+        buf = io.BytesIO()
+        image.crop(box).save(buf, format="PNG")
+        return rect["id"], buf.getvalue()
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(rects)) or 1) as executor:
+        return dict(executor.map(encode, rects))
@@ -0,0 +1,141 @@
+"""
+截图输出编码：PNG 压缩级别、JPEG/WebP 质量、按最大宽度缩放与缩略图。
+能由 Chromium 直接输出的格式（PNG、无需缩放的 JPEG）不做二次编码，其余在线程池中用 Pillow 处理。
+"""
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 为可选依赖，缺失时只能输出 Chromium 原生格式
+    Image = None
+
+EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+MIMETYPES = {".png": "image/png", ".jpg": "image/jpeg", ".webp": "image/webp"}
+
+# 有效截图的最小字节数，按实际编码格式区分：有损格式对纯色/空白区域压缩得更小
+MIN_BYTES = {
+    "png": {"element": 1024, "full_page": 10240},
+    "jpeg": {"element": 512, "full_page": 4096},
+    "webp": {"element": 256, "full_page": 2048},
+}
+
+_encoder = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="snap-encoder")
+
+
+def output_format(options):
+    """最终输出格式，没有 Pillow 时 WebP 退回 PNG"""
+    fmt = options["format"] if options["format"] in EXTENSIONS else "png"
+    if fmt == "webp" and Image is None:
+        print("[WARN] 未安装 Pillow，WebP 输出退回 PNG")
+        return "png"
+    return fmt
+
+
+def needs_postprocess(options):
+    """是否需要 Pillow 二次处理（格式转换、压缩级别、缩放或缩略图）"""
+    if Image is None:
+        return False
+    fmt = output_format(options)
+    return (
+        fmt == "webp"
+        or options["max_width"] > 0
+        or options["thumbnail_width"] > 0
+        or (fmt == "png" and options["png_compress_level"] >= 0)
+    )
+
+
+def needs_encode(data, options):
+    """
+    这张截图是否要经 Pillow 编码：需要二次处理，或字节的实际格式与输出格式不一致
+    （裁剪、分块拼接与备用截图得到的是 PNG，请求的却是 JPEG）
+    """
+    if Image is None:
+        return False
+    return needs_postprocess(options) or sniff_format(data) != output_format(options)
+
+
+def screenshot_kwargs(options):
+    """page/element.screenshot 的格式参数：不需要二次处理的 JPEG 直接由 Chromium 编码"""
+    if output_format(options) == "jpeg" and not needs_postprocess(options):
+        return {"type": "jpeg", "quality": options["quality"]}
+    return {}
+
+
+def output_name(filename, options):
+    """按输出格式替换文件扩展名"""
+    return os.path.splitext(filename)[0] + EXTENSIONS[output_format(options)]
+
+
+def format_name(filename, fmt):
+    """按给定格式替换文件扩展名"""
+    return os.path.splitext(filename)[0] + EXTENSIONS[fmt]
+
+
+def thumbnail_name(filename):
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_thumb{ext}"
+
+
+def mimetype_for(filename):
+    return MIMETYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream")
+
+
+def sniff_format(data):
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if data[:2] == b"\xff\xd8":
+        return "jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return "png"
+
+
+def is_valid(data, kind):
+    """
+    截图大小检查
+    :param kind: element 或 full_page
+    """
+    return len(data or b"") > MIN_BYTES[sniff_format(data or b"")][kind]
+
+
+def _save(image, fmt, options):
+    buf = io.BytesIO()
+    if fmt == "jpeg":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buf, format="JPEG", quality=options["quality"], optimize=False)
+    elif fmt == "webp":
+        image.save(buf, format="WEBP", quality=options["quality"], method=4)
+    else:
+        level = options["png_compress_level"]
+        image.save(buf, format="PNG", compress_level=level if level >= 0 else 6)
+    return buf.getvalue()
+
+
+def _resize(image, width):
+    if width <= 0 or image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def encode(data, options):
+    """
+    :param data: Chromium 输出的截图字节
+    :return: (主图字节, 缩略图字节或 None)
+    """
+    fmt = output_format(options)
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    main = _save(_resize(image, options["max_width"]), fmt, options)
+    thumb = None
+    if options["thumbnail_width"] > 0:
+        thumb = _save(_resize(image, options["thumbnail_width"]), fmt, options)
+    return main, thumb
+
+
+def encode_async(data, options):
+    """提交到编码线程池，返回 Future"""
+    return _encoder.submit(encode, data, options)
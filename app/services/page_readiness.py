@@ -0,0 +1,94 @@
+"""
+页面就绪检测：用事件代替固定等待，页面真正就绪后立即返回。
+
+就绪条件：document.readyState 为 complete、document.fonts.ready 已完成、没有加载中的图片与字体，
+且 MutationObserver / ResizeObserver 在 quiet_ms 内没有观察到 DOM 或布局变化。
+超过 max_ms 仍未就绪时直接返回，由调用方决定是否继续。
+"""
+
+READY_JS = """
+    ({maxMs, quietMs}) => new Promise(resolve => {
+        const start = performance.now();
+        let lastChange = start;
+        const bump = () => { lastChange = performance.now(); };
+
+        const mo = new MutationObserver(bump);
+        mo.observe(document.documentElement, {
+            childList: true, subtree: true, attributes: true, characterData: true
+        });
+        let ro = null;
+        if (window.ResizeObserver) {
+            ro = new ResizeObserver(bump);
+            ro.observe(document.documentElement);
+            if (document.body) ro.observe(document.body);
+        }
+
+        let fontsReady = !document.fonts;
+        if (document.fonts) document.fonts.ready.then(() => { fontsReady = true; });
+
+        // 视口外的 loading=lazy 图片不会主动加载，交给滚动阶段处理
+        const pendingImages = () => Array.from(document.images)
+            .filter(img => !img.complete && img.loading !== 'lazy').length;
+        const pendingFonts = () => document.fonts
+            ? Array.from(document.fonts).filter(f => f.status === 'loading').length
+            : 0;
+
+        const finish = (ready) => {
+            mo.disconnect();
+            if (ro) ro.disconnect();
+            resolve({
+                ready,
+                waited: Math.round(performance.now() - start),
+                pendingImages: pendingImages(),
+                pendingFonts: pendingFonts()
+            });
+        };
+
+        const check = () => {
+            const now = performance.now();
+            if (document.readyState === 'complete' && fontsReady &&
+                pendingImages() === 0 && pendingFonts() === 0 &&
+                now - lastChange >= quietMs) {
+                return finish(true);
+            }
+            if (now - start >= maxMs) return finish(false);
+            setTimeout(check, 16);
+        };
+        check();
+    })
+"""
+
+
+def _failed(e):
+    print(f"就绪检测失败（不影响继续）: {e}")
+    return {"ready": False, "waited": 0, "error": str(e)}
+
+
+def wait_until_ready(page, max_ms=1500, quiet_ms=100):
+    """
+    等待页面就绪
+    :param max_ms: 最长等待时间（毫秒）
+    :param quiet_ms: DOM 与布局保持不变多久视为稳定（毫秒）
+    :return: dict ready 是否就绪、waited 实际等待毫秒数、pendingImages/pendingFonts 剩余数量
+    """
+    try:
+        return page.evaluate(READY_JS, {"maxMs": max_ms, "quietMs": quiet_ms})
+    except Exception as e:
+        return _failed(e)
+
+
+async def wait_until_ready_async(page, max_ms=1500, quiet_ms=100):
+    """wait_until_ready 的 async_api 版本"""
+    try:
+        return await page.evaluate(READY_JS, {"maxMs": max_ms, "quietMs": quiet_ms})
+    except Exception as e:
+        return _failed(e)
+
+
+def record_wait(result, wait):
+    """把一次就绪等待累计到截图结果的 readiness 字段"""
+    readiness = result.setdefault("readiness", {"waits": 0, "waited_ms": 0, "not_ready": 0})
+    readiness["waits"] += 1
+    readiness["waited_ms"] += wait.get("waited", 0)
+    if not wait.get("ready"):
+        readiness["not_ready"] += 1
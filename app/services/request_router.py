@@ -0,0 +1,171 @@
+"""
+截图页面的请求拦截：按资源类型与 URL 规则屏蔽统计、广告、媒体等请求，
+命中本地静态资源白名单的请求直接从磁盘返回，其余静态资源经过共享的资源缓存，减少页面加载时间与带宽。
+"""
+import os
+import re
+
+from app.services.asset_cache import asset_cache
+from app.utils.metrics import SNAP_ROUTED_REQUESTS_TOTAL
+
+# 默认屏蔽的统计与广告域名（正则，匹配完整 URL）
+DEFAULT_BLOCK_PATTERNS = (
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"googlesyndication\.com",
+    r"doubleclick\.net",
+    r"adservice\.google\.",
+    r"connect\.facebook\.net",
+    r"hm\.baidu\.com",
+    r"cnzz\.com",
+    r"51\.la/",
+    r"hotjar\.com",
+    r"/beacon\b",
+)
+
+DEFAULT_BLOCK_TYPES = ("media",)
+
+
+def _split(value):
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return list(value or [])
+
+
+class RequestRouter:
+    """
+    page.route 处理器：
+    - 本地资源：URL 以配置的前缀开头且磁盘上有对应文件时直接返回文件
+    - 屏蔽：资源类型或 URL 规则命中时中止请求（主页面导航永不屏蔽）
+    - 其余请求中的静态资源查询共享资源缓存，其他正常放行
+    """
+
+    def __init__(self, block_types=DEFAULT_BLOCK_TYPES, block_patterns=DEFAULT_BLOCK_PATTERNS, local_assets=None):
+        """
+        :param block_types: 屏蔽的资源类型，如 media、font、image
+        :param block_patterns: 屏蔽的 URL 正则
+        :param local_assets: {URL 前缀: 本地目录}
+        """
+        self.configure(block_types, block_patterns, local_assets)
+
+    def init_app(self, app):
+        self.configure(
+            _split(app.config.get("SNAP_BLOCK_RESOURCE_TYPES", ",".join(DEFAULT_BLOCK_TYPES))),
+            _split(app.config.get("SNAP_BLOCK_URL_PATTERNS", "")) or DEFAULT_BLOCK_PATTERNS,
+            self.parse_local_assets(app.config.get("SNAP_LOCAL_ASSETS", ""))
+        )
+        app.extensions["snap_request_router"] = self
+
+    def configure(self, block_types, block_patterns, local_assets):
+        self.block_types = set(block_types)
+        self.block_patterns = list(block_patterns)
+        self._block_re = re.compile("|".join(f"(?:{p})" for p in self.block_patterns)) if self.block_patterns else None
+        self.local_assets = {prefix: os.path.realpath(path) for prefix, path in (local_assets or {}).items()}
+
+    def settings(self):
+        """可序列化的配置，供其他进程（如截图集群的工作进程）重建相同的路由"""
+        return {
+            "block_types": sorted(self.block_types),
+            "block_patterns": self.block_patterns,
+            "local_assets": self.local_assets
+        }
+
+    @staticmethod
+    def parse_local_assets(value):
+        """解析 "URL前缀=目录,URL前缀=目录" 格式的配置"""
+        assets = {}
+        for item in _split(value):
+            prefix, sep, path = item.rpartition("=")
+            if sep and prefix:
+                assets[prefix] = path
+        return assets
+
+    # ---------------------- 决策 ----------------------
+    def _local_file(self, url):
+        for prefix, root in self.local_assets.items():
+            if not url.startswith(prefix):
+                continue
+            relative = url[len(prefix):].split("?", 1)[0].split("#", 1)[0].lstrip("/")
+            path = os.path.realpath(os.path.join(root, relative))
+            # 防止 ../ 逃出白名单目录
+            if path.startswith(root + os.sep) and os.path.isfile(path):
+                return path
+        return None
+
+    def decide(self, request, options):
+        """
+        :return: (动作, 本地文件路径)，动作为 fulfill / abort / continue
+        """
+        url = request.url
+        if url.startswith(("data:", "blob:")):
+            return "continue", None
+
+        path = self._local_file(url)
+        if path is not None:
+            return "fulfill", path
+
+        if not options["block"]:
+            return "continue", None
+        if request.resource_type == "document" and self._is_main_frame(request):
+            return "continue", None
+
+        block_types = self.block_types | set(_split(options["block_types"]))
+        if request.resource_type in block_types:
+            return "abort", None
+        if self._block_re is not None and self._block_re.search(url):
+            return "abort", None
+        return "continue", None
+
+    @staticmethod
+    def _is_main_frame(request):
+        try:
+            return request.frame.parent_frame is None
+        except Exception:
+            # service worker 等请求没有 frame
+            return False
+
+    # ---------------------- 处理器 ----------------------
+    def handler(self, options):
+        """返回供同步 API page.route / context.route 使用的处理函数"""
+
+        def handle(route, request):
+            action, path = self.decide(request, options)
+            SNAP_ROUTED_REQUESTS_TOTAL.inc(action=action)
+            if action == "fulfill":
+                route.fulfill(path=path)
+            elif action == "abort":
+                route.abort("blockedbyclient")
+            else:
+                try:
+                    if asset_cache.handle(route, request):
+                        return
+                except Exception as e:
+                    print(f"[WARN] 资源缓存处理失败，直接请求: {request.url}, {e}")
+                route.continue_()
+        return handle
+
+    def async_handler(self, options):
+        """返回供异步 API 使用的处理函数"""
+
+        async def handle(route, request):
+            action, path = self.decide(request, options)
+            SNAP_ROUTED_REQUESTS_TOTAL.inc(action=action)
+            if action == "fulfill":
+                await route.fulfill(path=path)
+            elif action == "abort":
+                await route.abort("blockedbyclient")
+            else:
+                try:
+                    if await asset_cache.handle_async(route, request):
+                        return
+                except Exception as e:
+                    print(f"[WARN] 资源缓存处理失败，直接请求: {request.url}, {e}")
+                await route.continue_()
+        return handle
+
+    def needed(self, options):
+        """没有需要拦截的规则时不注册 route，避免每个请求多一次往返"""
+        return bool(options["block"] or self.local_assets or asset_cache.enabled)
+
+
+request_router = RequestRouter()
@@ -0,0 +1,150 @@
+"""
+截图调度：优先级通道与截止时间。
+任务按截止时间最早优先（EDF）出队，截止时间相同时按通道优先级；执行中的任务不会被抢占。
+未显式给出截止时间的任务使用所在通道的默认时限，因此交互请求自然排在批量与后台任务之前，
+而等待已久的后台任务截止时间临近后也能被调度，不会饿死。
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+# 通道 -> (优先级，数值小的优先；默认时限（秒）)
+LANES = {
+    "interactive": (0, 30),
+    "batch": (1, 300),
+    "background": (2, 1800),
+}
+DEFAULT_LANE = "interactive"
+
+
+class AdmissionRejected(Exception):
+    """预计无法在截止时间前完成，提交时直接拒绝"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(TimeoutError):
+    """任务出队时已超过截止时间，未占用浏览器即放弃"""
+
+
+def lane_of(priority):
+    return priority if priority in LANES else DEFAULT_LANE
+
+
+def resolve_deadline(priority, deadline_ms=0, timeout=None, now=None):
+    """
+    :param priority: 通道名
+    :param deadline_ms: 显式给出的相对截止时间（毫秒），0 表示未给出
+    :param timeout: 调用方等待结果的最长时间（秒），与通道默认时限取较小值
+    :return: 绝对截止时间（time.time() 时间戳）
+    """
+    now = now or time.time()
+    budget = deadline_ms / 1000 if deadline_ms else LANES[lane_of(priority)][1]
+    if timeout:
+        budget = min(budget, timeout)
+    return now + budget
+
+
+class DeadlineQueue:
+    """按 (截止时间, 通道优先级, 提交顺序) 出队的阻塞队列"""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def put(self, item, deadline=float("inf"), priority=None):
+        rank = LANES[priority][0] if priority in LANES else len(LANES)
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, rank, next(self._seq), item))
+            self._cond.notify()
+
+    def get(self):
+        with self._cond:
+            while not self._heap:
+                self._cond.wait()
+            return heapq.heappop(self._heap)[-1]
+
+    def ahead_of(self, deadline):
+        """排在给定截止时间之前（含相同）的任务数"""
+        with self._cond:
+            return sum(1 for entry in self._heap if entry[0] <= deadline)
+
+    def qsize(self):
+        with self._cond:
+            return len(self._heap)
+
+
+class AsyncDeadlineGate:
+    """
+    asyncio 并发闸门，代替 Semaphore：名额释放时按 (截止时间, 通道优先级, 到达顺序) 唤醒等待者。
+    只能在所属事件循环中 acquire / release；waiting / ahead_of 供其他线程做近似的准入估算。
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.busy = 0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    async def acquire(self, deadline=float("inf"), priority=None):
+        if self.busy < self.slots and not self.waiting():
+            self.busy += 1
+            return
+        rank = LANES[priority][0] if priority in LANES else len(LANES)
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (deadline, rank, next(self._seq), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # 名额已转交但协程在恢复前被取消，归还名额
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        """名额直接转交给最早截止的等待者，没有等待者时才减少占用数"""
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)[-1]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.busy -= 1
+
+    def waiting(self):
+        return sum(1 for entry in list(self._waiters) if not entry[-1].done())
+
+    def ahead_of(self, deadline):
+        """排在给定截止时间之前（含相同）的等待者数"""
+        return sum(1 for entry in list(self._waiters) if entry[0] <= deadline and not entry[-1].done())
+
+
+class ServiceTimeEstimator:
+    """任务执行时间的指数滑动平均，用于准入时估算完成时间"""
+
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self.average = None
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            if self.average is None:
+                self.average = seconds
+            else:
+                self.average += self.alpha * (seconds - self.average)
+
+    def estimate_finish(self, ahead, running, workers, now=None):
+        """
+        预计完成时间：排在前面的任务与一半在途任务按 workers 并行消化，再加上自身执行时间；
+        还没有样本时返回 None（不做准入拒绝）
+        """
+        if self.average is None:
+            return None
+        now = now or time.time()
+        backlog = (ahead + running * 0.5) / max(1, workers)
+        return now + (backlog + 1) * self.average
@@ -0,0 +1,149 @@
+"""
+页面内增量滚动：整个滚动过程在页面中以一个 async 例程完成，只需一次 evaluate 往返。
+
+每一步用 scrollend 事件确认滚动完成，用 IntersectionObserver 跟踪进入视口的懒加载图片，
+等这些图片加载完且 DOM 静默 settle_ms 后再走下一步；页面高度增长时继续向下滚动，
+到底、窗口无法继续滚动或超过 max_ms 后回到顶部，并把滚动指标返回给 Python。
+"""
+
+SCROLL_JS = """
+    async ({step, maxMs, settleMs, stepMaxMs}) => {
+        const start = performance.now();
+        const root = document.scrollingElement || document.documentElement;
+        const height = () => Math.max(document.body ? document.body.scrollHeight : 0, root.scrollHeight);
+        const sleep = ms => new Promise(r => setTimeout(r, ms));
+        const frame = () => new Promise(r => requestAnimationFrame(() => r()));
+        const initialHeight = height();
+
+        // 进入视口后仍未加载完成的懒加载图片
+        const pending = new Set();
+        const io = 'IntersectionObserver' in window ? new IntersectionObserver(entries => {
+            for (const entry of entries) {
+                if (!entry.isIntersecting) continue;
+                const el = entry.target;
+                io.unobserve(el);
+                if (el.tagName === 'IMG' && !el.complete) {
+                    pending.add(el);
+                    const done = () => pending.delete(el);
+                    el.addEventListener('load', done, {once: true});
+                    el.addEventListener('error', done, {once: true});
+                }
+            }
+        }, {rootMargin: '200px'}) : null;
+        const observed = new WeakSet();
+        const observeLazy = () => {
+            if (!io) return;
+            document.querySelectorAll('img[loading=lazy], img[data-src], iframe[loading=lazy]').forEach(el => {
+                if (!observed.has(el)) {
+                    observed.add(el);
+                    io.observe(el);
+                }
+            });
+        };
+
+        let lastMutation = performance.now();
+        const mo = new MutationObserver(() => {
+            lastMutation = performance.now();
+            observeLazy();
+        });
+        mo.observe(document.documentElement, {
+            childList: true, subtree: true, attributes: true, attributeFilter: ['src', 'srcset', 'style', 'class']
+        });
+        observeLazy();
+
+        const scrollTo = y => new Promise(resolve => {
+            if (Math.abs(window.scrollY - y) < 1 || !('onscrollend' in window)) {
+                window.scrollTo({top: y, behavior: 'instant'});
+                frame().then(resolve);
+                return;
+            }
+            let done = false;
+            const finish = () => {
+                if (done) return;
+                done = true;
+                window.removeEventListener('scrollend', finish);
+                resolve();
+            };
+            window.addEventListener('scrollend', finish);
+            window.scrollTo({top: y, behavior: 'instant'});
+            setTimeout(finish, 200);  // 滚动位置被页面限制时 scrollend 可能不触发
+        });
+
+        const settle = async deadline => {
+            while (performance.now() < deadline) {
+                if (pending.size === 0 && performance.now() - lastMutation >= settleMs) return true;
+                await sleep(16);
+            }
+            return false;
+        };
+
+        let steps = 0;
+        let unsettled = 0;
+        let timedOut = false;
+        let stuck = false;
+        let stalls = 0;
+        let position = 0;
+        try {
+            while (true) {
+                const before = window.scrollY;
+                await scrollTo(position);
+                steps += 1;
+                const deadline = Math.min(performance.now() + stepMaxMs, start + maxMs);
+                if (!await settle(deadline)) unsettled += 1;
+                if (window.scrollY + window.innerHeight >= height() - 1) break;
+                if (performance.now() - start >= maxMs) {
+                    timedOut = true;
+                    break;
+                }
+                // 窗口无法滚动（如 body/html overflow: hidden 而内容很高）时 scrollY 不再变化，连续两步未移动即停止
+                if (steps > 1 && Math.abs(window.scrollY - before) < 1) {
+                    stalls += 1;
+                    if (stalls >= 2) {
+                        stuck = true;
+                        break;
+                    }
+                } else {
+                    stalls = 0;
+                }
+                position = window.scrollY + step;
+            }
+        } finally {
+            mo.disconnect();
+            if (io) io.disconnect();
+            window.scrollTo({top: 0, behavior: 'instant'});
+            await frame();
+        }
+
+        return {
+            steps,
+            unsettled,
+            timedOut,
+            stuck,
+            pending: pending.size,
+            initialHeight,
+            finalHeight: height(),
+            elapsed: Math.round(performance.now() - start)
+        };
+    }
+"""
+
+
+def _args(step, max_ms, settle_ms, step_max_ms):
+    return {"step": step, "maxMs": max_ms, "settleMs": settle_ms, "stepMaxMs": step_max_ms}
+
+
+def scroll_page(page, step=800, max_ms=15000, settle_ms=50, step_max_ms=500):
+    """
+    在页面内从顶部滚动到底部再回到顶部，触发懒加载内容
+    :param step: 每步滚动距离（像素）
+    :param max_ms: 滚动总时长上限（毫秒）
+    :param settle_ms: 每步 DOM 静默多久视为懒加载完成（毫秒）
+    :param step_max_ms: 每步最长等待时间（毫秒）
+    :return: dict steps、elapsed、initialHeight、finalHeight、timedOut、stuck 等滚动指标
+    """
+    return page.evaluate(SCROLL_JS, _args(step, max_ms, settle_ms, step_max_ms))
+
+
+async def scroll_page_async(page, step=800, max_ms=15000, settle_ms=50, step_max_ms=500):
+    """scroll_page 的 async_api 版本"""
+    return await page.evaluate(SCROLL_JS, _args(step, max_ms, settle_ms, step_max_ms))
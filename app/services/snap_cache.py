@@ -0,0 +1,159 @@
+import atexit
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+
+from app.utils.cache_index import PersistentIndexMixin
+
+
+class SnapResultCache(PersistentIndexMixin):
+    """
+    截图结果缓存：按页面内容指纹 + 视口 + 元素列表 + 截图参数建键，命中时直接返回之前生成的文件。
+    本地文件用内容 sha256 作指纹；URL 只在开启 url_validation 时用 HEAD 请求取 ETag / Last-Modified，
+    否则不缓存（HEAD 请求会阻塞每次截图）。
+    按总字节数、条目数与存活时间淘汰，淘汰时同时删除截图文件。
+    """
+
+    def __init__(self, index_path="app/static/storage/snap_cache.json", max_bytes=512 * 1024 * 1024,
+                 max_entries=10000, max_age=86400, url_validation=False):
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.url_validation = url_validation
+        self._entries = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "uncacheable": 0}
+
+    def init_app(self, app):
+        self.index_path = app.config.get("SNAP_CACHE_INDEX", self.index_path)
+        self.max_bytes = app.config.get("SNAP_CACHE_MAX_BYTES", self.max_bytes)
+        self.max_entries = app.config.get("SNAP_CACHE_MAX_ENTRIES", self.max_entries)
+        self.max_age = app.config.get("SNAP_CACHE_MAX_AGE", self.max_age)
+        self.url_validation = app.config.get("SNAP_CACHE_URL_VALIDATION", self.url_validation)
+        atexit.register(self.flush)
+        app.extensions["snap_cache"] = self
+
+    _index_label = "截图缓存索引"
+
+    # ---------------------- 缓存键 ----------------------
+    def _fingerprint(self, html_path):
+        """页面内容指纹，无法确定内容是否变化时返回 None"""
+        if html_path.startswith("http"):
+            if not self.url_validation:
+                return None
+            try:
+                req = urllib.request.Request(html_path, method="HEAD")
+                with urllib.request.urlopen(req, timeout=3) as resp:
+                    etag = resp.headers.get("ETag")
+                    modified = resp.headers.get("Last-Modified")
+            except Exception as e:
+                print(f"[WARN] 获取页面缓存标识失败: {html_path}, {e}")
+                return None
+            if not etag and not modified:
+                return None
+            return f"{html_path}|{etag or ''}|{modified or ''}"
+
+        digest = hashlib.sha256()
+        try:
+            with open(html_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def make_key(self, html_path, element_ids, options, viewport=None):
+        """
+        :return: 缓存键，页面内容无法确定时返回 None（不缓存）
+        """
+        fingerprint = self._fingerprint(html_path)
+        if fingerprint is None:
+            with self._lock:
+                self._stats["uncacheable"] += 1
+            return None
+        payload = json.dumps({
+            "page": fingerprint,
+            "viewport": viewport,
+            "element_ids": list(element_ids or []),
+            "options": options
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ---------------------- 读写 ----------------------
+    @staticmethod
+    def _files(result):
+        filenames = [filename for item in result["success"] for filename in item.values()]
+        filenames.extend(result.get("thumbnails", {}).values())
+        return [os.path.join(result["dir"], filename) for filename in filenames]
+
+    def get(self, key):
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None:
+                expired = time.time() - entry["created_at"] > self.max_age
+                if expired or not all(os.path.exists(p) for p in entry["files"]):
+                    self._evict(key)
+                    entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            result = copy.deepcopy(entry["result"])
+        result["cached"] = True
+        return result
+
+    def put(self, key, result):
+        """只缓存全部成功的结果，不缓存流式返回的图片字节"""
+        if result.get("failed") or not result.get("success"):
+            return
+        result = {k: v for k, v in result.items() if k != "images"}
+        files = self._files(result)
+        try:
+            size = sum(os.path.getsize(p) for p in files)
+        except OSError:
+            return
+        with self._lock:
+            self._load()
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = {
+                "result": copy.deepcopy(result),
+                "files": files,
+                "size": size,
+                "created_at": time.time()
+            }
+            self._bytes += size
+            self._stats["stores"] += 1
+            self._shrink()
+            self._save()
+
+    # ---------------------- 淘汰与持久化 ----------------------
+    def _evict(self, key, remove_files=True):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+        self._stats["evictions"] += 1
+        if remove_files:
+            for path in entry["files"]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _shrink(self):
+        """按存活时间、条目数、总字节数依次淘汰最久未使用的条目"""
+        expire_before = time.time() - self.max_age
+        for key in [k for k, e in self._entries.items() if e["created_at"] < expire_before]:
+            self._evict(key)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._evict(next(iter(self._entries)))
+
+    def _index_loaded(self, key, entry):
+        self._bytes += entry["size"]
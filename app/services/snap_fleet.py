@@ -0,0 +1,389 @@
+"""
+多进程截图集群：N 个工作进程各自持有浏览器池，由 Flask 进程内的调度器通过本地队列分发任务。
+
+- 调度：选择在途任务最少的存活进程（least-loaded）
+- CPU：默认每个 CPU 核一个进程，可按核绑定（sched_setaffinity）
+- 容错：进程崩溃后立即重启，其在途任务以错误结束
+- 内存：所有进程（含 Chromium 子进程）常驻内存超过上限时，让占用最多的进程处理完在途任务后退出重启
+"""
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.services.asset_cache import asset_cache
+from app.services.request_router import request_router
+from app.services.scheduling import AdmissionRejected, DeadlineExceeded
+from app.services.snap_options import normalize_options
+from app.utils.metrics import SNAP_STAGE_SECONDS
+
+try:
+    import psutil
+except ImportError:  # psutil 为可选依赖，缺失时不做内存上限控制
+    psutil = None
+
+# 进程正常退出后，等待收集线程取走其已写入结果队列的结果的最长时间（秒），超时的在途任务以错误结束
+_ORPHAN_GRACE = 5
+
+
+def _error_payload(error):
+    """工作进程中的异常转为可跨进程传递的 (类型, 消息, retry_after)，调度相关异常保留类型"""
+    if isinstance(error, AdmissionRejected):
+        return ("rejected", str(error), error.retry_after)
+    if isinstance(error, DeadlineExceeded):
+        return ("expired", str(error), None)
+    if isinstance(error, TimeoutError):
+        return ("timeout", str(error), None)
+    return ("error", f"{type(error).__name__}: {error}", None)
+
+
+def _rebuild_error(payload):
+    kind, message, retry_after = payload
+    if kind == "rejected":
+        return AdmissionRejected(message, retry_after=retry_after)
+    if kind == "expired":
+        return DeadlineExceeded(message)
+    if kind == "timeout":
+        return TimeoutError(message)
+    return RuntimeError(message)
+
+
+def _worker_main(index, tasks, results, settings):
+    """工作进程入口：持有独立的浏览器池，并发执行分到本进程的任务"""
+    from app.services.browser_pool import BrowserPool
+    from app.services.snap_service import PlaywrightSnapService
+
+    cpus = settings.get("cpus")
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError as e:
+            print(f"[WARN] snap worker {index} 绑定 CPU 失败: {e}")
+
+    request_router.configure(**settings["router"])
+    # 资源体目录共享，索引按进程分开
+    asset_cache.configure(index_name=f"index-{index}.json", **settings["asset_cache"])
+    pool = BrowserPool(
+        size=settings["pool_size"],
+        max_uses=settings["max_uses"],
+        max_rss_mb=settings["max_rss_mb"],
+        page_max_uses=settings["page_max_uses"]
+    )
+    service = PlaywrightSnapService(pool=pool)
+    executor = ThreadPoolExecutor(max_workers=settings["pool_size"])
+
+    def run(task_id, params, timeout):
+        try:
+            # 工作进程中的阶段直方图不会出现在 Flask 进程的 /metrics 中，阶段耗时随结果带回由父进程记录
+            options = normalize_options(params["options"])
+            wants_timings = options["timings"]
+            options["timings"] = True
+            result = service.capture_snap(
+                html_path=params["html_path"],
+                task_token=params["task_token"],
+                element_ids=params["element_ids"],
+                timeout=timeout,
+                options=options
+            )
+            timings = dict(result["timings"]) if wants_timings else result.pop("timings")
+            results.put((index, task_id, True, (result, timings)))
+        except Exception as e:
+            results.put((index, task_id, False, _error_payload(e)))
+
+    while True:
+        message = tasks.get()
+        if message is None:
+            break
+        executor.submit(run, *message)
+
+    executor.shutdown(wait=True)
+    pool.shutdown()
+    asset_cache.flush()
+
+
+class _Worker:
+    def __init__(self, index, cpus):
+        self.index = index
+        self.cpus = cpus
+        self.process = None
+        self.tasks = None
+        self.inflight = {}
+        self.draining = False
+        self.completed = 0
+        self.restarts = 0
+
+    def rss_mb(self):
+        if psutil is None or self.process is None or not self.process.is_alive():
+            return 0
+        try:
+            proc = psutil.Process(self.process.pid)
+            procs = [proc] + proc.children(recursive=True)
+        except psutil.Error:
+            return 0
+        total = 0
+        for p in procs:
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+
+class SnapFleet:
+    """
+    多进程截图调度器，capture_snap 签名与 PlaywrightSnapService 一致
+    """
+
+    def __init__(self, workers=0, pool_size=2, max_uses=200, max_rss_mb=1024, total_rss_mb=0, pin_cpus=False,
+                 page_max_uses=0):
+        """
+        :param workers: 工作进程数，0 表示按 CPU 核数
+        :param pool_size: 每个进程的浏览器池大小（即进程内并发数）
+        :param max_uses: 单个浏览器最多服务的任务数
+        :param max_rss_mb: 单个浏览器进程树内存上限（MB）
+        :param total_rss_mb: 集群总内存上限（MB），0 表示不限
+        :param pin_cpus: 是否把每个进程绑定到固定的 CPU 核
+        :param page_max_uses: 浏览器池页面复用次数上限，0 表示不复用
+        """
+        self.workers = workers
+        self.pool_size = pool_size
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.total_rss_mb = total_rss_mb
+        self.pin_cpus = pin_cpus
+        self.page_max_uses = page_max_uses
+        self._ctx = multiprocessing.get_context("spawn")
+        self._results = None
+        self._workers = []
+        self._futures = {}
+        self._orphans = {}
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._running = False
+        self._stopping = False
+        self._generation = 0
+        self._stats = {"submitted": 0, "crashes": 0, "memory_recycles": 0}
+
+    def init_app(self, app):
+        self.workers = app.config.get("SNAP_FLEET_WORKERS", self.workers)
+        self.pool_size = app.config.get("SNAP_FLEET_POOL_SIZE", self.pool_size)
+        self.max_uses = app.config.get("SNAP_POOL_MAX_USES", self.max_uses)
+        self.max_rss_mb = app.config.get("SNAP_POOL_MAX_RSS_MB", self.max_rss_mb)
+        self.total_rss_mb = app.config.get("SNAP_FLEET_MAX_RSS_MB", self.total_rss_mb)
+        self.pin_cpus = app.config.get("SNAP_FLEET_PIN_CPUS", self.pin_cpus)
+        self.page_max_uses = app.config.get("SNAP_POOL_PAGE_MAX_USES", self.page_max_uses)
+        atexit.register(self.shutdown)
+        app.extensions["snap_fleet"] = self
+
+    # ---------------------- 进程管理 ----------------------
+    def _cpu_sets(self, count):
+        if hasattr(os, "sched_getaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+        else:
+            cpus = list(range(os.cpu_count() or 1))
+        if not self.pin_cpus:
+            return [None] * count
+        # 连续切分，每个进程分到一段相邻的核
+        size = max(1, len(cpus) // count)
+        return [cpus[i * size:(i + 1) * size] or cpus for i in range(count)]
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._running:
+                return
+            count = self.workers or os.cpu_count() or 1
+            self._results = self._ctx.Queue()
+            self._workers = [_Worker(i, cpus) for i, cpus in enumerate(self._cpu_sets(count))]
+            for worker in self._workers:
+                self._spawn(worker)
+            self._running = True
+            self._generation += 1
+            generation = self._generation
+        threading.Thread(target=self._collect, args=(generation,), name="snap-fleet-collector", daemon=True).start()
+        threading.Thread(target=self._monitor, args=(generation,), name="snap-fleet-monitor", daemon=True).start()
+
+    def _alive(self, generation):
+        return self._running and self._generation == generation
+
+    def warmup(self):
+        """提前启动所有工作进程"""
+        self._ensure_started()
+
+    def _spawn(self, worker):
+        worker.tasks = self._ctx.Queue()
+        worker.draining = False
+        settings = {
+            "cpus": worker.cpus,
+            "pool_size": self.pool_size,
+            "max_uses": self.max_uses,
+            "max_rss_mb": self.max_rss_mb,
+            "page_max_uses": self.page_max_uses,
+            "router": request_router.settings(),
+            "asset_cache": asset_cache.settings()
+        }
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.index, worker.tasks, self._results, settings),
+            name=f"snap-worker-{worker.index}",
+            daemon=True
+        )
+        worker.process.start()
+
+    def _collect(self, generation):
+        """收集工作进程返回的结果，关闭时运行到所有进程退出之后"""
+        while self._alive(generation):
+            try:
+                index, task_id, ok, payload = self._results.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                worker = self._workers[index]
+                worker.inflight.pop(task_id, None)
+                self._orphans.pop(task_id, None)
+                worker.completed += 1
+                future = self._futures.pop(task_id, None)
+            if ok:
+                payload, timings = payload
+                for stage, ms in timings.items():
+                    if stage != "total":
+                        SNAP_STAGE_SECONDS.observe(ms / 1000, stage=stage)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(_rebuild_error(payload))
+
+    def _monitor(self, generation):
+        """重启退出的进程，结束没有结果返回的在途任务，总内存超限时回收占用最多的进程"""
+        while self._alive(generation):
+            time.sleep(1)
+            with self._lock:
+                if self._stopping:
+                    continue
+                for worker in self._workers:
+                    if worker.process.is_alive():
+                        continue
+                    if worker.draining and worker.process.exitcode == 0:
+                        # 正常回收退出时在途结果已写入结果队列，留给收集线程一段时间，取不到的再以错误结束
+                        deadline = time.time() + _ORPHAN_GRACE
+                        for task_id in worker.inflight:
+                            self._orphans[task_id] = deadline
+                    else:
+                        self._stats["crashes"] += 1
+                        print(f"[WARN] snap worker {worker.index} 异常退出 (exitcode={worker.process.exitcode})，重启")
+                        self._fail(list(worker.inflight), "snap worker crashed")
+                    worker.inflight.clear()
+                    worker.restarts += 1
+                    self._spawn(worker)
+                now = time.time()
+                self._fail([t for t, deadline in self._orphans.items() if deadline <= now],
+                           "snap worker exited without returning a result")
+                if self.total_rss_mb:
+                    self._enforce_memory_cap()
+
+    def _fail(self, task_ids, message):
+        """以错误结束在途任务，调用方持有 self._lock"""
+        for task_id in task_ids:
+            self._orphans.pop(task_id, None)
+            future = self._futures.pop(task_id, None)
+            if future is not None:
+                future.set_exception(RuntimeError(message))
+
+    def _enforce_memory_cap(self):
+        usage = [(w.rss_mb(), w) for w in self._workers if not w.draining]
+        if not usage or sum(rss for rss, _ in usage) <= self.total_rss_mb:
+            return
+        rss, worker = max(usage, key=lambda item: item[0])
+        print(f"snap 集群内存超过上限 {self.total_rss_mb}MB，回收 worker {worker.index}（{rss:.0f}MB）")
+        worker.draining = True
+        worker.tasks.put(None)
+        self._stats["memory_recycles"] += 1
+
+    # ---------------------- 调度 ----------------------
+    def submit(self, params, timeout=None):
+        """
+        分发到在途任务最少的工作进程
+        :return: concurrent.futures.Future
+        """
+        self._ensure_started()
+        future = Future()
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError("snap fleet is shutting down")
+            candidates = [w for w in self._workers if not w.draining and w.process.is_alive()]
+            if not candidates:
+                candidates = [w for w in self._workers if not w.draining] or self._workers
+            worker = min(candidates, key=lambda w: len(w.inflight))
+            task_id = next(self._task_ids)
+            worker.inflight[task_id] = time.time()
+            self._futures[task_id] = future
+            self._stats["submitted"] += 1
+            # 在锁内入队：回收与关闭同样在锁内投递结束标记，任务不会排在结束标记之后
+            worker.tasks.put((task_id, params, timeout))
+        return future
+
+    def capture_snap(self, html_path: str, task_token: str, element_ids: list = None, timeout: float = None,
+                     options: dict = None):
+        params = {
+            "html_path": html_path,
+            "task_token": task_token,
+            "element_ids": element_ids or [],
+            "options": options
+        }
+        return self.submit(params, timeout).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["workers"] = [
+                {
+                    "index": w.index,
+                    "pid": w.process.pid if w.process else None,
+                    "alive": bool(w.process and w.process.is_alive()),
+                    "cpus": w.cpus,
+                    "inflight": len(w.inflight),
+                    "completed": w.completed,
+                    "restarts": w.restarts,
+                    "draining": w.draining,
+                    "rss_mb": round(w.rss_mb(), 1)
+                }
+                for w in self._workers
+            ]
+        return stats
+
+    def shutdown(self, timeout=30):
+        """
+        通知所有进程处理完在途任务后退出；收集线程在进程退出后继续取完结果队列，
+        仍未返回结果的任务以错误结束
+        """
+        with self._lock:
+            if not self._running or self._stopping:
+                return
+            self._stopping = True
+            workers = list(self._workers)
+            for worker in workers:
+                worker.draining = True
+                worker.tasks.put(None)
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        deadline = time.time() + _ORPHAN_GRACE
+        while time.time() < deadline:
+            with self._lock:
+                if not self._futures:
+                    break
+            time.sleep(0.1)
+        with self._lock:
+            self._fail(list(self._futures), "snap fleet shut down")
+            for worker in workers:
+                worker.inflight.clear()
+            self._running = False
+            self._stopping = False
@@ -0,0 +1,170 @@
+import threading
+import time
+import uuid
+
+from app.services.scheduling import AdmissionRejected, DeadlineQueue, ServiceTimeEstimator
+
+
+class QueueFullError(Exception):
+    """任务队列已满"""
+
+
+class SnapJob:
+    def __init__(self, params: dict, timeout: float):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.deadline = self.created_at + timeout
+        self.done = threading.Event()
+
+    def finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self.done.set()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "deadline": self.deadline
+        }
+
+
+class SnapJobQueue:
+    """
+    进程内截图任务队列：提交后立即返回任务 id，由固定数量的工作线程执行。
+    队列有界，满时拒绝提交；每个任务带截止时间，按截止时间最早优先执行，
+    预计无法按时完成的任务提交时即拒绝，过期未开始的任务直接标记 expired。
+    """
+
+    def __init__(self, runner=None, workers=4, max_queue=100, default_timeout=120, result_ttl=3600):
+        """
+        :param runner: 执行函数 runner(params, timeout)，返回截图结果
+        :param workers: 工作线程数
+        :param max_queue: 排队任务上限
+        :param default_timeout: 任务默认截止时间（秒，从提交开始计算）
+        :param result_ttl: 已完成任务的保留时间（秒）
+        """
+        self.runner = runner
+        self.workers = workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self.result_ttl = result_ttl
+        self._queue = None
+        self._estimator = ServiceTimeEstimator()
+        self._running = 0
+        self._jobs = {}
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def init_app(self, app, runner=None):
+        self.runner = runner or self.runner
+        self.workers = app.config.get("SNAP_JOB_WORKERS", self.workers)
+        self.max_queue = app.config.get("SNAP_JOB_MAX_QUEUE", self.max_queue)
+        self.default_timeout = app.config.get("SNAP_JOB_TIMEOUT", self.default_timeout)
+        self.result_ttl = app.config.get("SNAP_JOB_RESULT_TTL", self.result_ttl)
+        app.extensions["snap_job_queue"] = self
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._queue = DeadlineQueue()
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"snap-job-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, params: dict, timeout: float = None) -> SnapJob:
+        """
+        提交任务，params["options"]["priority"] 决定通道
+        :raises QueueFullError: 队列已满
+        :raises AdmissionRejected: 预计无法在截止时间前完成
+        """
+        self._ensure_started()
+        self._prune()
+        job = SnapJob(params, timeout or self.default_timeout)
+        if self._queue.qsize() >= self.max_queue:
+            raise QueueFullError(f"任务队列已满（{self.max_queue}）")
+        finish = self._estimator.estimate_finish(self._queue.ahead_of(job.deadline), self._running, self.workers)
+        if finish is not None and finish > job.deadline:
+            raise AdmissionRejected(
+                f"预计 {finish - job.created_at:.1f}s 后才能完成，超过截止时间",
+                retry_after=max(1, int(finish - job.deadline) + 1)
+            )
+        with self._lock:
+            self._jobs[job.id] = job
+        self._queue.put(job, job.deadline, (params.get("options") or {}).get("priority"))
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            remaining = job.deadline - time.time()
+            if remaining <= 0:
+                job.finish("expired", error="任务在开始前已超过截止时间")
+                continue
+            job.status = "running"
+            job.started_at = time.time()
+            with self._lock:
+                self._running += 1
+            try:
+                job.finish("done", result=self.runner(job.params, remaining))
+            except TimeoutError:
+                job.finish("expired", error="任务执行超过截止时间")
+            except Exception as e:
+                print(f"截图任务失败 {job.id}: {e}")
+                job.finish("failed", error=str(e))
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self._estimator.observe(time.time() - job.started_at)
+
+    def _prune(self):
+        """清理超过保留时间的已完成任务"""
+        expire_before = time.time() - self.result_ttl
+        with self._lock:
+            stale = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < expire_before
+            ]
+            for job_id in stale:
+                del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._running,
+            "jobs": counts
+        }
+
+    def shutdown(self, timeout=10):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for t in threads:
+            t.join(timeout)
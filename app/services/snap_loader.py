@@ -0,0 +1,79 @@
+"""
+截图服务的按需初始化：snap_controller 及其依赖（playwright、浏览器池、进程集群等）在第一次访问
+截图接口或显式调用 warmup 时才导入并 init_app，用户接口、flask db 等命令不为其付出启动成本。
+"""
+import threading
+
+
+class SnapLoader:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions["snap_loader"] = self
+        if not app.config.get("SNAP_LAZY_INIT", True):
+            self.load(app)
+        if app.config.get("SNAP_WARMUP", False):
+            self.warmup(app)
+
+    def load(self, app):
+        """导入截图模块并初始化各服务，每个 app 只执行一次；返回 snap_controller 模块"""
+        from app.controllers import snap_controller
+        if app.extensions.get("snap_loaded"):
+            return snap_controller
+        with self._lock:
+            if not app.extensions.get("snap_loaded"):
+                from app.services.request_router import request_router
+                from app.services.asset_cache import asset_cache
+                snap_controller.snap_service.init_app(app)
+                snap_controller.async_snap_service.init_app(app)
+                snap_controller.snap_fleet.init_app(app)
+                request_router.init_app(app)
+                asset_cache.init_app(app)
+                snap_controller.snap_job_queue.init_app(app)
+                snap_controller.snap_cache.init_app(app)
+                app.extensions["snap_loaded"] = True
+        return snap_controller
+
+    def loaded(self, app):
+        return bool(app.extensions.get("snap_loaded"))
+
+    def warmup(self, app):
+        """
+        预热：初始化服务并提前启动默认引擎的浏览器，第一个请求不再等待浏览器启动。
+        同步浏览器池始终预热；默认引擎为 fleet / async 时同时启动工作进程 / 事件循环。
+        """
+        controller = self.load(app)
+        if controller.snap_service.pool is not None:
+            controller.snap_service.pool.warmup()
+        engine = app.config.get("SNAP_DEFAULT_ENGINE", "sync")
+        if engine == "fleet" and app.config.get("SNAP_FLEET_ENABLED", False):
+            controller.snap_fleet.warmup()
+        elif engine == "async":
+            controller.async_snap_service.warmup()
+
+    def shutdown(self, app, timeout=30):
+        """
+        优雅退出：排队与在途的截图任务先执行完（各队列的结束标记排在所有任务之后），
+        再关闭浏览器与工作进程，最后等待图片写盘并保存资源缓存索引。未初始化过截图服务时不做任何事。
+        :param timeout: 每一步等待的最长时间（秒）
+        """
+        if not self.loaded(app):
+            return
+        from app.services import snap_storage
+        from app.services.asset_cache import asset_cache
+        controller = self.load(app)
+        controller.snap_job_queue.shutdown(timeout)
+        if controller.snap_service.pool is not None:
+            controller.snap_service.pool.shutdown(timeout)
+        controller.async_snap_service.shutdown(timeout)
+        controller.snap_fleet.shutdown(timeout)
+        try:
+            snap_storage.flush(timeout)
+        except Exception as e:
+            print(f"[WARN] 等待图片写盘失败: {e}")
+        controller.snap_cache.flush()
+        asset_cache.flush()
+
+
+snap_loader = SnapLoader()
@@ -0,0 +1,101 @@
+"""
+截图请求的可选参数：统一默认值与类型转换，各截图引擎只读取这里定义的键
+"""
+
+DEFAULT_OPTIONS = {
+    # element_ids 模式下一次取得所有元素位置、整页截一次图再在内存中裁剪
+    "batch": False,
+    # 页面就绪检测的最长等待时间与 DOM/布局静默时间（毫秒）
+    "ready_max_ms": 1500,
+    "ready_quiet_ms": 100,
+    # 全屏截图前页面内滚动的步长（像素）与总时长上限（毫秒）
+    "scroll_step": 800,
+    "scroll_max_ms": 15000,
+    # 相同页面内容与参数的请求直接返回已有截图
+    "cache": True,
+    # file：返回文件名；stream：直接在响应中返回图片（单张为 PNG，多张为 zip）
+    "response_mode": "file",
+    # 落盘方式：sync 同步写盘、async 后台写盘、none 不写盘（仅 stream 模式有效，file 模式下按 sync 处理）
+    "persist": "sync",
+    # 分块全屏截图：每块高度与最大截取高度（像素，0 表示不限），需要 Pillow
+    "tiled": False,
+    "tile_height": 4096,
+    "tiled_max_height": 0,
+    # 在结果中返回各阶段耗时（毫秒）
+    "timings": False,
+    # 输出格式 png / jpeg / webp，有损格式的质量（1-100），PNG 压缩级别（0-9，-1 表示使用 Chromium 原始输出）
+    "format": "png",
+    "quality": 80,
+    "png_compress_level": -1,
+    # 按最大宽度等比缩小（像素，0 表示不缩放）；另外生成指定宽度的缩略图（0 表示不生成），需要 Pillow
+    "max_width": 0,
+    "thumbnail_width": 0,
+    # 按配置屏蔽统计/广告等请求与资源类型；block_types 追加屏蔽的资源类型（逗号分隔，如 font,image）
+    "block": True,
+    "block_types": "",
+    # 自包含的本地静态 HTML（无脚本、懒加载与外部资源）用 set_content 渲染，跳过就绪等待与滚动
+    "fast_path": True,
+    # 调度通道 interactive / batch / background，与相对截止时间（毫秒，0 表示使用通道默认时限）
+    "priority": "interactive",
+    "deadline_ms": 0,
+}
+
+# 数值参数的取值范围（闭区间，None 表示不限），超出时截断到边界
+OPTION_RANGES = {
+    "quality": (1, 100),
+    "png_compress_level": (-1, 9),
+    "tile_height": (1, None),
+}
+
+# 只影响响应方式与调度、不影响截图内容的参数，不参与缓存键
+RESPONSE_OPTIONS = ("cache", "response_mode", "persist", "timings", "priority", "deadline_ms")
+
+
+class InvalidOption(ValueError):
+    """参数值无法转换为默认值的类型"""
+
+    def __init__(self, key):
+        super().__init__(f"invalid {key}")
+        self.key = key
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def normalize_options(data: dict = None) -> dict:
+    """
+    按 DEFAULT_OPTIONS 的类型转换请求参数，未提供的键使用默认值，数值按 OPTION_RANGES 截断
+    :raises InvalidOption: 参数值无法转换
+    """
+    data = data or {}
+    options = dict(DEFAULT_OPTIONS)
+    for key, default in DEFAULT_OPTIONS.items():
+        value = data.get(key)
+        if value is None:
+            continue
+        if isinstance(default, bool):
+            options[key] = _to_bool(value)
+        elif default is None:
+            options[key] = value
+        else:
+            try:
+                options[key] = type(default)(value)
+            except (TypeError, ValueError):
+                raise InvalidOption(key) from None
+    for key, (low, high) in OPTION_RANGES.items():
+        if low is not None:
+            options[key] = max(low, options[key])
+        if high is not None:
+            options[key] = min(high, options[key])
+    if options["persist"] == "none" and options["response_mode"] != "stream":
+        # file 模式返回的是文件名，不写盘时文件并不存在
+        options["persist"] = "sync"
+    return options
+
+
+def capture_key_options(options: dict) -> dict:
+    """影响截图内容的参数，用于缓存键与请求合并"""
+    return {k: v for k, v in options.items() if k not in RESPONSE_OPTIONS}
@@ -1,3 +1,5 @@
+import atexit
+import io
 import os
 import time
 import datetime
@@ -5,7 +7,34 @@ import random
 import string
 from playwright.sync_api import sync_playwright
 
+from app.services.browser_pool import BrowserPool, LAUNCH_ARGS, CONTEXT_OPTIONS
+from app.services.element_batch import (
+    Image, ALL_PRESENT_JS, ELEMENT_RECTS_JS, LAZY_TARGETS_JS, crop_regions, group_clips, to_box, to_clip
+)
+from app.services.snap_options import normalize_options
+from app.services.page_readiness import wait_until_ready, record_wait
+from app.services.scroll_driver import scroll_page
+from app.services.snap_storage import store_image, finish_encoding
+from app.services.request_router import request_router
+from app.services import static_fast_path
+from app.services.scheduling import resolve_deadline
+from app.services import image_encoding, tiled_capture
+from app.utils.metrics import StageTimer
+
 class PlaywrightSnapService:
+    def __init__(self, pool: BrowserPool = None):
+        self.pool = pool
+
+    def init_app(self, app):
+        """根据配置创建常驻浏览器池，浏览器启动成本每个槽位只付一次"""
+        if app.config.get("SNAP_POOL_SIZE", 0) > 0 and self.pool is None:
+            self.pool = BrowserPool.from_config(app.config)
+            atexit.register(self.pool.shutdown)
+        app.extensions["snap_service"] = self
+
+    def pool_stats(self):
+        return self.pool.stats() if self.pool is not None else None
+
     @staticmethod
     def _chmod_644(path):
         """统一设置图片权限为 644"""
@@ -22,249 +51,356 @@ class PlaywrightSnapService:
         os.makedirs(full_path, exist_ok=True)
         return full_path
 
-    def capture_snap(self, html_path: str, task_token: str, element_ids: list = None):
+    def capture_snap(self, html_path: str, task_token: str, element_ids: list = None, timeout: float = None,
+                     options: dict = None):
         """
         :param html_path: HTML 文件路径或 URL
         :param task_token: 任务唯一标识，用于生成文件名
         :param element_ids: 需要截图的元素 id 列表，默认空则截图全页
+        :param timeout: 等待浏览器池返回结果的最长时间（秒），超时抛出 TimeoutError；
+                        同时作为浏览器池调度的截止时间上限
+        :param options: 可选参数，见 snap_options.DEFAULT_OPTIONS
         :return: dict 包含 success 与 failed，同时返回截图目录
         """
         element_ids = element_ids or []
-        output_dir = self._generate_storage_dir()
-        result = {"success": [], "failed": [], "dir": output_dir}
+        options = normalize_options(options)
+        deadline = resolve_deadline(options["priority"], options["deadline_ms"], timeout)
+        timer = StageTimer()
+        with timer.stage("storage_dir"):
+            output_dir = self._generate_storage_dir()
         rand_str = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
+        capture_args = (html_path, task_token, element_ids, output_dir, rand_str, options, timer)
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,
-                args=[
-                    "--no-sandbox",
-                    "--disable-gpu",
-                    "--disable-dev-shm-usage",
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-features=IsolateOrigins,site-per-process",
-                    "--start-maximized"
-                ]
+        if self.pool is not None:
+            # 使用常驻浏览器池，每次任务拿到一个新的 BrowserContext
+            result = self.pool.run(
+                self._capture_in_context, *capture_args,
+                timeout=timeout, priority=options["priority"], deadline=deadline
             )
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                           "AppleWebKit/537.36 (KHTML, like Gecko) "
-                           "Chrome/114.0.0.0 Safari/537.36",
-                java_script_enabled=True
-            )
-            page = context.new_page()
+        else:
+            with sync_playwright() as p:
+                with timer.stage("browser"):
+                    browser = p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+                    context = browser.new_context(**CONTEXT_OPTIONS)
+                result = self._capture_in_context(context, *capture_args)
+                with timer.stage("browser_close"):
+                    browser.close()
+
+        finish_encoding(result, options, timer)
+        if options["timings"]:
+            result["timings"] = timer.as_dict()
+        print(f"截图任务完成，成功: {len(result['success'])}, 失败: {len(result['failed'])}, "
+              f"耗时: {timer.elapsed() * 1000:.0f}ms")
+        return result
 
-            # 打开页面
-            try:
-                if html_path.startswith("http"):
+    def _capture_in_context(self, context, html_path, task_token, element_ids, output_dir, rand_str, options,
+                            timer, page=None):
+        """在给定的 BrowserContext 中打开页面并截图，page 为浏览器池复用的页面时直接使用"""
+        if self.pool is not None:
+            # 从提交到浏览器池到开始执行：排队、浏览器启动与 context 创建
+            timer.record("pool_wait", timer.elapsed() - timer.stages.get("storage_dir", 0))
+        result = {"success": [], "failed": [], "dir": output_dir}
+        with timer.stage("new_page"):
+            if page is None:
+                page = context.new_page()
+            if request_router.needed(options):
+                page.route("**/*", request_router.handler(options))
+
+        with timer.stage("analyze"):
+            fast = static_fast_path.use_fast_path(html_path, options)
+
+        # 打开页面
+        try:
+            with timer.stage("goto"):
+                if fast:
+                    page.set_content(static_fast_path.read_html(html_path), wait_until="load")
+                elif html_path.startswith("http"):
                     page.goto(html_path, wait_until="networkidle")
                 else:
                     page.goto(f"file:///{html_path}", wait_until="load")
-            except Exception as e:
-                browser.close()
-                result["failed"].append({"id": "page_load", "error": f"页面加载失败: {str(e)}"})
-                return result
+        except Exception as e:
+            result["failed"].append({"id": "page_load", "error": f"页面加载失败: {str(e)}"})
+            return result
 
-            # 等待页面稳定
-            page.wait_for_load_state("networkidle")
-            page.wait_for_timeout(1000)
+        if fast:
+            # 自包含的静态页面加载完成即可截图
+            result["fast_path"] = True
+            self._capture_static(page, element_ids, task_token, rand_str, output_dir, result, options, timer)
+            return result
 
-            # ---------------------- 处理弹窗 ----------------------
+        # 等待页面稳定：图片、字体加载完成且 DOM 与布局不再变化
+        with timer.stage("load_state"):
+            page.wait_for_load_state("networkidle")
+        self._wait_ready(page, result, options, timer, 1000)
 
+        # ---------------------- 处理弹窗 ----------------------
 
-            # ---------------------- 等待懒加载内容 ----------------------
+        # ---------------------- 智能滚动（仅全屏截图需要） ----------------------
+        if not element_ids:  # 只有全屏截图时才需要滚动
             try:
-                # 等待图片加载
-                page.evaluate("""
-                    () => {
-                        const imgs = Array.from(document.getElementsByTagName('img'));
-                        return Promise.all(imgs.map(img => {
-                            if (img.complete) return Promise.resolve();
-                            return new Promise((resolve, reject) => {
-                                img.onload = resolve;
-                                img.onerror = resolve;  // 即使出错也继续
-                                setTimeout(resolve, 100);
-                            });
-                        }));
-                    }
-                """)
-
-                # 等待可能的数据加载
-                page.wait_for_timeout(500)
+                # 整个滚动过程在页面内完成，一次往返返回滚动指标
+                with timer.stage("scroll"):
+                    metrics = scroll_page(
+                        page,
+                        step=options["scroll_step"],
+                        max_ms=options["scroll_max_ms"]
+                    )
+                result["scroll"] = metrics
+                print(f"滚动完成，{metrics['steps']} 步，高度 {metrics['initialHeight']} -> "
+                      f"{metrics['finalHeight']}px，耗时 {metrics['elapsed']}ms")
 
             except Exception as e:
-                print(f"等待懒加载失败（不影响继续）: {e}")
-
-            # ---------------------- 智能滚动（仅全屏截图需要） ----------------------
-            if not element_ids:  # 只有全屏截图时才需要滚动
+                print(f"智能滚动失败，使用备用方案: {e}")
+                try:
+                    # 备用方案：简单滚动到底部再回到顶部
+                    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                    self._wait_ready(page, result, options, timer, 1000)
+                    page.evaluate("window.scrollTo(0, 0)")
+                    self._wait_ready(page, result, options, timer, 800)
+                except:
+                    pass
+
+        # ---------------------- 截图逻辑 ----------------------
+        if element_ids and options["batch"]:
+            self._capture_elements_batch(page, element_ids, task_token, rand_str, output_dir, result, options, timer)
+        elif element_ids:
+            for element_id in element_ids:
+                selector = f"#{element_id}"
                 try:
-                    # 获取页面总高度
-                    total_height = page.evaluate("document.body.scrollHeight || document.documentElement.scrollHeight")
-                    viewport_height = page.evaluate("window.innerHeight")
-
-                    if total_height > viewport_height:
-                        print(f"开始智能滚动，总高度: {total_height}px")
-
-                        scroll_step = 800
-                        scroll_delay = 300
-                        current_position = 0
-                        max_attempts = total_height // scroll_step + 3
-
-                        for attempt in range(max_attempts):
-                            # 滚动一步
-                            page.evaluate(f"window.scrollTo(0, {current_position})")
-                            page.wait_for_timeout(scroll_delay)
-
-                            # 等待可能的动态加载
-                            page.wait_for_timeout(200)
-
-                            # 检查是否到达底部
-                            new_height = page.evaluate(
-                                "document.body.scrollHeight || document.documentElement.scrollHeight")
-                            current_scroll = page.evaluate("window.pageYOffset || document.documentElement.scrollTop")
-
-                            # 如果高度增加，说明有动态加载
-                            if new_height > total_height:
-                                total_height = new_height
-
-                            # 更新当前位置
-                            current_position += scroll_step
-
-                            # 如果已经滚动到底部或超过
-                            if current_position >= total_height or current_scroll + viewport_height >= total_height:
-                                print(f"滚动完成，当前滚动位置: {current_position}")
-                                break
-
-                        # 最终滚回顶部，确保截图从顶部开始
-                        page.evaluate("window.scrollTo(0, 0)")
-                        page.wait_for_timeout(800)  # 等待滚动完成和重绘
-                        print("已滚动回顶部")
+                    # 等待元素稳定
+                    with timer.stage("wait_selector"):
+                        element = page.wait_for_selector(selector, timeout=15000, state="visible")
+
+                    # 确保元素在视图中（滚动到元素位置）
+                    element.scroll_into_view_if_needed()
+                    self._wait_ready(page, result, options, timer, 500)  # 等待滚动后重绘
+
+                    # 检查元素是否可见
+                    is_visible = page.evaluate("""
+                        (selector) => {
+                            const el = document.querySelector(selector);
+                            if (!el) return false;
+                            const style = window.getComputedStyle(el);
+                            return style.display !== 'none' && 
+                                   style.visibility !== 'hidden' && 
+                                   style.opacity !== '0' &&
+                                   el.offsetWidth > 0 &&
+                                   el.offsetHeight > 0;
+                        }
+                    """, selector)
+
+                    if not is_visible:
+                        result["failed"].append({"id": element_id, "error": "Element not visible"})
+                        continue
+
+                    filename = f"{element_id}{task_token}{rand_str}.png"
+
+                    # 对元素截图，等待布局稳定
+                    self._wait_ready(page, result, options, timer, 300)
+
+                    # 尝试截图元素
+                    with timer.stage("screenshot"):
+                        data = element.screenshot(timeout=5000, **image_encoding.screenshot_kwargs(options))
+
+                    # 检查截图大小
+                    if image_encoding.is_valid(data, "element"):
+                        store_image(result, element_id, data, output_dir, filename, options, timer)
+                        print(f"元素截图成功: {element_id}")
                     else:
-                        print("页面高度小于视口，无需滚动")
+                        result["failed"].append(
+                            {"id": element_id, "error": "Screenshot file is empty or too small"})
 
                 except Exception as e:
-                    print(f"智能滚动失败，使用备用方案: {e}")
-                    try:
-                        # 备用方案：简单滚动到底部再回到顶部
-                        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                        page.wait_for_timeout(1000)
-                        page.evaluate("window.scrollTo(0, 0)")
-                        page.wait_for_timeout(800)
-                    except:
-                        pass
-
-            # ---------------------- 截图逻辑 ----------------------
-            if element_ids:
-                for element_id in element_ids:
-                    selector = f"#{element_id}"
-                    try:
-                        # 等待元素稳定
-                        element = page.wait_for_selector(selector, timeout=15000, state="visible")
-
-                        # 确保元素在视图中（滚动到元素位置）
-                        element.scroll_into_view_if_needed()
-                        page.wait_for_timeout(500)  # 等待滚动后重绘
-
-                        # 检查元素是否可见
-                        is_visible = page.evaluate("""
-                            (selector) => {
-                                const el = document.querySelector(selector);
-                                if (!el) return false;
-                                const style = window.getComputedStyle(el);
-                                return style.display !== 'none' && 
-                                       style.visibility !== 'hidden' && 
-                                       style.opacity !== '0' &&
-                                       el.offsetWidth > 0 &&
-                                       el.offsetHeight > 0;
-                            }
-                        """, selector)
-
-                        if not is_visible:
-                            result["failed"].append({"id": element_id, "error": "Element not visible"})
-                            continue
-
-                        filename = f"{element_id}{task_token}{rand_str}.png"
-                        output_img = os.path.join(output_dir, filename)
-
-                        # 对元素截图，增加等待确保稳定
-                        page.wait_for_timeout(300)
+                    error_msg = str(e)
+                    print(f"元素截图失败 {element_id}: {error_msg}")
+                    result["failed"].append({"id": element_id, "error": error_msg})
+        elif options["tiled"] and tiled_capture.Image is not None:
+            self._capture_full_page_tiled(page, task_token, rand_str, output_dir, result, options, timer)
+        else:
+            try:
+                filename = f"fullpage{task_token}{rand_str}.png"
 
-                        # 尝试截图元素
-                        element.screenshot(
-                            path=output_img,
-                            timeout=5000
-                        )
+                # 等待页面完全稳定
+                self._wait_ready(page, result, options, timer, 800)
 
-                        # 检查截图文件
-                        if os.path.exists(output_img) and os.path.getsize(output_img) > 1024:
-                            self._chmod_644(output_img)
-                            result["success"].append({element_id: filename})
-                            print(f"元素截图成功: {element_id}")
-                        else:
-                            result["failed"].append(
-                                {"id": element_id, "error": "Screenshot file is empty or too small"})
-
-                    except Exception as e:
-                        error_msg = str(e)
-                        print(f"元素截图失败 {element_id}: {error_msg}")
-                        result["failed"].append({"id": element_id, "error": error_msg})
-            else:
-                try:
-                    filename = f"fullpage{task_token}{rand_str}.png"
-                    output_img = os.path.join(output_dir, filename)
-
-                    # 等待页面完全稳定
-                    page.wait_for_timeout(800)
-
-                    print("开始全屏截图...")
-                    # 尝试全屏截图
-                    page.screenshot(
-                        path=output_img,
-                        full_page=True,
-                        timeout=10000
-                    )
+                print("开始全屏截图...")
+                # 尝试全屏截图
+                with timer.stage("screenshot"):
+                    data = page.screenshot(full_page=True, timeout=10000, **image_encoding.screenshot_kwargs(options))
 
-                    # 检查截图是否有效
-                    if os.path.exists(output_img) and os.path.getsize(output_img) > 10240:  # 大于10KB
-                        self._chmod_644(output_img)
-                        result["success"].append({"full_page": filename})
-                        print(f"全屏截图成功，文件大小: {os.path.getsize(output_img)} bytes")
+                # 检查截图是否有效（按实际编码格式判断最小大小）
+                if image_encoding.is_valid(data, "full_page"):
+                    store_image(result, "full_page", data, output_dir, filename, options, timer)
+                    print(f"全屏截图成功，文件大小: {len(data)} bytes")
+                else:
+                    # 如果截图太小，可能是失败，尝试备用方案
+                    print("全屏截图文件太小，尝试备用方案...")
+                    data = self._try_backup_screenshot(page, result, timer)
+                    if image_encoding.is_valid(data, "full_page"):
+                        store_image(result, "full_page", data, output_dir, filename, options, timer)
+                        print(f"备用截图成功，文件大小: {len(data)} bytes")
                     else:
-                        # 如果截图太小，可能是失败，尝试备用方案
-                        print("全屏截图文件太小，尝试备用方案...")
-                        self._try_backup_screenshot(page, output_img)
-                        if os.path.exists(output_img) and os.path.getsize(output_img) > 10240:
-                            self._chmod_644(output_img)
-                            result["success"].append({"full_page": filename})
-                            print(f"备用截图成功，文件大小: {os.path.getsize(output_img)} bytes")
-                        else:
-                            result["failed"].append(
-                                {"id": "full_page", "error": "Screenshot file is empty or too small"})
-
-                except Exception as e:
-                    error_msg = str(e)
-                    print(f"全屏截图失败: {error_msg}")
-
-                    # 尝试备用方案
-                    try:
-                        print("尝试备用截图方案...")
-                        self._try_backup_screenshot(page, output_img)
-                        if os.path.exists(output_img) and os.path.getsize(output_img) > 10240:
-                            self._chmod_644(output_img)
-                            result["success"].append({"full_page": filename})
-                            print("备用截图成功")
-                        else:
-                            result["failed"].append({"id": "full_page", "error": error_msg})
-                    except Exception as backup_error:
                         result["failed"].append(
-                            {"id": "full_page", "error": f"{error_msg} | 备用方案也失败: {backup_error}"})
+                            {"id": "full_page", "error": "Screenshot file is empty or too small"})
+
+            except Exception as e:
+                error_msg = str(e)
+                print(f"全屏截图失败: {error_msg}")
 
-            browser.close()
+                # 尝试备用方案
+                try:
+                    print("尝试备用截图方案...")
+                    data = self._try_backup_screenshot(page, result, timer)
+                    if image_encoding.is_valid(data, "full_page"):
+                        store_image(result, "full_page", data, output_dir, filename, options, timer)
+                        print("备用截图成功")
+                    else:
+                        result["failed"].append({"id": "full_page", "error": error_msg})
+                except Exception as backup_error:
+                    result["failed"].append(
+                        {"id": "full_page", "error": f"{error_msg} | 备用方案也失败: {backup_error}"})
 
-        print(f"截图任务完成，成功: {len(result['success'])}, 失败: {len(result['failed'])}")
         return result
 
+    def _capture_static(self, page, element_ids, task_token, rand_str, output_dir, result, options, timer):
+        """快速通道：不等待、不滚动，直接截图"""
+        if element_ids and options["batch"]:
+            self._capture_elements_batch(page, element_ids, task_token, rand_str, output_dir, result, options, timer)
+            return
+        shot_kwargs = image_encoding.screenshot_kwargs(options)
+        if not element_ids:
+            with timer.stage("screenshot"):
+                data = page.screenshot(full_page=True, timeout=10000, **shot_kwargs)
+            if image_encoding.is_valid(data, "full_page"):
+                store_image(result, "full_page", data, output_dir, f"fullpage{task_token}{rand_str}.png", options, timer)
+            else:
+                result["failed"].append({"id": "full_page", "error": "Screenshot file is empty or too small"})
+            return
+        for element_id in element_ids:
+            try:
+                with timer.stage("screenshot"):
+                    element = page.query_selector(f"#{element_id}")
+                    if element is None or not element.is_visible():
+                        result["failed"].append({"id": element_id, "error": "Element not visible"})
+                        continue
+                    data = element.screenshot(timeout=5000, **shot_kwargs)
+                if image_encoding.is_valid(data, "element"):
+                    store_image(result, element_id, data, output_dir, f"{element_id}{task_token}{rand_str}.png",
+                                options, timer)
+                else:
+                    result["failed"].append({"id": element_id, "error": "Screenshot file is empty or too small"})
+            except Exception as e:
+                result["failed"].append({"id": element_id, "error": str(e)})
+
+    @staticmethod
+    def _wait_ready(page, result, options, timer, max_ms):
+        """事件驱动的就绪等待，最长不超过 max_ms 与 ready_max_ms，实际等待时间记入 result"""
+        with timer.stage("ready"):
+            wait = wait_until_ready(
+                page,
+                max_ms=min(max_ms, options["ready_max_ms"]),
+                quiet_ms=options["ready_quiet_ms"]
+            )
+        record_wait(result, wait)
+        return wait
+
+    def _capture_elements_batch(self, page, element_ids, task_token, rand_str, output_dir, result, options, timer):
+        """
+        批量元素截图：一次 evaluate 取得所有元素位置，按 tile_height 分组，每组截一次图后在内存中裁剪并并行编码
+        """
+        try:
+            with timer.stage("wait_selector"):
+                page.wait_for_function(ALL_PRESENT_JS, arg=element_ids, timeout=15000)
+        except Exception as e:
+            print(f"部分元素未出现，继续截取已存在的元素: {e}")
+        try:
+            # 懒加载内容加载后元素尺寸可能变化，先滚动到位再读取坐标
+            with timer.stage("scroll"):
+                page.evaluate(LAZY_TARGETS_JS, {"ids": element_ids, "maxMs": options["scroll_max_ms"]})
+        except Exception as e:
+            print(f"等待懒加载失败（不影响继续）: {e}")
+
+        targets = []
+        with timer.stage("element_rects"):
+            rects = page.evaluate(ELEMENT_RECTS_JS, element_ids)
+        for rect in rects:
+            if not rect["found"]:
+                result["failed"].append({"id": rect["id"], "error": "Element not found"})
+            elif not rect["visible"]:
+                result["failed"].append({"id": rect["id"], "error": "Element not visible"})
+            else:
+                targets.append(rect)
+        if not targets:
+            return
+
+        try:
+            if Image is not None:
+                crops = {}
+                for clip, members in group_clips(targets, options["tile_height"]):
+                    with timer.stage("screenshot"):
+                        image = page.screenshot(full_page=True, clip=clip, scale="css", timeout=10000)
+                    with timer.stage("crop"):
+                        crops.update(crop_regions(image, clip, members))
+            else:
+                # 没有 Pillow 时按元素区域逐个截图，仍然省去每个元素的等待
+                with timer.stage("screenshot"):
+                    crops = {
+                        rect["id"]: page.screenshot(
+                            full_page=True, clip=to_clip(to_box(rect)), scale="css", timeout=5000,
+                            **image_encoding.screenshot_kwargs(options)
+                        )
+                        for rect in targets
+                    }
+        except Exception as e:
+            print(f"批量元素截图失败: {e}")
+            for rect in targets:
+                result["failed"].append({"id": rect["id"], "error": str(e)})
+            return
+
+        for rect in targets:
+            element_id = rect["id"]
+            data = crops.get(element_id) or b""
+            if not image_encoding.is_valid(data, "element"):
+                result["failed"].append({"id": element_id, "error": "Screenshot file is empty or too small"})
+                continue
+            filename = f"{element_id}{task_token}{rand_str}.png"
+            store_image(result, element_id, data, output_dir, filename, options, timer)
+        print(f"批量元素截图完成: {len(targets)} 个元素")
+
+    def _capture_full_page_tiled(self, page, task_token, rand_str, output_dir, result, options, timer):
+        """
+        分块全屏截图：按 tile_height 逐块截取并流式拼接，超长页面也不会分配整页大小的图像
+        """
+        filename = f"fullpage{task_token}{rand_str}.png"
+        output_img = os.path.join(output_dir, filename)
+        self._wait_ready(page, result, options, timer, 800)
+        tile_args = {"tile_height": options["tile_height"], "max_height": options["tiled_max_height"]}
+        try:
+            if (options["persist"] == "sync" and options["response_mode"] == "file"
+                    and not image_encoding.needs_postprocess(options)):
+                # 直接写入目标文件，内存中只保留一块
+                with timer.stage("screenshot"), open(output_img, "wb") as f:
+                    result["tiles"] = tiled_capture.capture_tiled(page, f, **tile_args)
+                    size = f.tell()
+                if size > 10240:
+                    self._chmod_644(output_img)
+                    result["success"].append({"full_page": filename})
+                else:
+                    result["failed"].append({"id": "full_page", "error": "Screenshot file is empty or too small"})
+            else:
+                buf = io.BytesIO()
+                with timer.stage("screenshot"):
+                    result["tiles"] = tiled_capture.capture_tiled(page, buf, **tile_args)
+                data = buf.getvalue()
+                if image_encoding.is_valid(data, "full_page"):
+                    store_image(result, "full_page", data, output_dir, filename, options, timer)
+                else:
+                    result["failed"].append({"id": "full_page", "error": "Screenshot file is empty or too small"})
+            print(f"分块全屏截图完成: {result['tiles']}")
+        except Exception as e:
+            print(f"分块全屏截图失败: {e}")
+            result["failed"].append({"id": "full_page", "error": str(e)})
+
     def _close(self):
         try:
             # 尝试关闭常见的弹窗
@@ -306,10 +442,27 @@ class PlaywrightSnapService:
 
         except Exception as e:
             print(f"处理弹窗时出错（不影响继续）: {e}")
-    def _try_backup_screenshot(self, page, output_path):
+    def _try_backup_screenshot(self, page, result=None, timer=None):
         """
         备用截图方案：当全屏截图失败时使用
+        :return: 图片字节
         """
+        if timer is None:
+            return self._backup_screenshot(page, result)
+        with timer.stage("backup_screenshot"):
+            return self._backup_screenshot(page, result)
+
+    def _backup_screenshot(self, page, result=None):
+        if tiled_capture.Image is not None:
+            # 分块截取整页，不再受 10000px 视口上限影响
+            try:
+                print("执行备用截图方案（分块截图）...")
+                buf = io.BytesIO()
+                tiled_capture.capture_tiled(page, buf)
+                return buf.getvalue()
+            except Exception as e:
+                print(f"分块截图失败，改用大视口截图: {e}")
+
         try:
             print("执行备用截图方案...")
 
@@ -324,20 +477,23 @@ class PlaywrightSnapService:
 
             # 临时调整视口大小以容纳整个页面
             page.set_viewport_size({"width": 1920, "height": total_height})
-            page.wait_for_timeout(1500)  # 等待布局重绘
+            wait = wait_until_ready(page, max_ms=1500)  # 等待布局重绘
+            if result is not None:
+                record_wait(result, wait)
 
             # 尝试截图
-            page.screenshot(path=output_path, timeout=10000)
+            data = page.screenshot(timeout=10000)
 
             # 恢复原始视口
             if original_viewport:
                 page.set_viewport_size(original_viewport)
+            return data
 
         except Exception as e:
             print(f"备用截图方案失败: {e}")
 
             # 最后尝试：仅截取可视区域
             try:
-                page.screenshot(path=output_path)
+                return page.screenshot()
             except:
                 raise Exception("所有截图方案都失败")
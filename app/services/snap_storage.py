@@ -0,0 +1,120 @@
+"""
+截图落盘：截图始终以字节形式留在内存中，按 persist 参数同步写盘、后台写盘或不写盘，
+response_mode=stream 时字节随结果返回，由控制器直接写入响应。
+需要二次编码（格式转换、缩放、缩略图）时编码在线程池中进行，由 finish_encoding 汇总结果。
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services import image_encoding
+
+_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="snap-writer")
+_pending = set()
+
+
+def write_image(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    try:
+        os.chmod(path, 0o644)
+    except Exception as e:
+        print(f"[WARN] chmod failed: {path}, {e}")
+
+
+def store_image(result, key, data, output_dir, filename, options, timer=None):
+    """
+    记录一张截图
+    :param result: 截图结果，成功项追加到 result["success"]
+    :param key: 元素 id 或 full_page
+    :param data: Chromium 输出的图片字节
+    :param filename: 文件名，扩展名按输出格式替换
+    :param options: 读取 persist（sync/async/none）、response_mode（file/stream）与输出编码参数
+    :param timer: StageTimer，同步写盘耗时记为 write 阶段
+    """
+    if not image_encoding.needs_encode(data, options):
+        # 不编码时扩展名跟随实际字节格式：没有 Pillow 时拼接得到的 PNG 不能以 .jpg 返回
+        filename = image_encoding.format_name(filename, image_encoding.sniff_format(data))
+        _store(result, key, data, output_dir, filename, options, timer)
+        return
+
+    filename = image_encoding.output_name(filename, options)
+
+    if options["persist"] == "async" and options["response_mode"] == "file":
+        # 编码与写盘都在后台完成，结果中只需要文件名
+        future = _writer.submit(_encode_and_write, data, output_dir, filename, options)
+        _pending.add(future)
+        future.add_done_callback(_pending.discard)
+        result["success"].append({key: filename})
+        if options["thumbnail_width"] > 0:
+            result.setdefault("thumbnails", {})[key] = image_encoding.thumbnail_name(filename)
+        return
+
+    # 先提交编码，浏览器继续截下一张，finish_encoding 时再等待
+    future = image_encoding.encode_async(data, options)
+    result.setdefault("_encoding", []).append((key, filename, future))
+
+
+def finish_encoding(result, options, timer=None):
+    """等待 store_image 提交的编码任务，写盘并记录结果；编码失败的截图记入 failed"""
+    pending = result.pop("_encoding", None)
+    if not pending:
+        return result
+    start = time.perf_counter()
+    for key, filename, future in pending:
+        try:
+            data, thumb = future.result()
+        except Exception as e:
+            print(f"[WARN] 截图编码失败: {filename}, {e}")
+            result["failed"].append({"id": key, "error": f"encode failed: {e}"})
+            continue
+        _store(result, key, data, result["dir"], filename, options, timer)
+        if thumb is not None:
+            thumb_name = image_encoding.thumbnail_name(filename)
+            _store(result, None, thumb, result["dir"], thumb_name, options, timer)
+            result.setdefault("thumbnails", {})[key] = thumb_name
+    if timer is not None:
+        timer.record("encode", time.perf_counter() - start)
+    return result
+
+
+def _encode_and_write(data, output_dir, filename, options):
+    main, thumb = image_encoding.encode(data, options)
+    write_image(os.path.join(output_dir, filename), main)
+    if thumb is not None:
+        write_image(os.path.join(output_dir, image_encoding.thumbnail_name(filename)), thumb)
+
+
+def _store(result, key, data, output_dir, filename, options, timer=None):
+    """按 persist 写盘、按 response_mode 保留字节；key 为 None 时不计入 success（如缩略图）"""
+    persist = options["persist"]
+    if persist == "sync":
+        start = time.perf_counter()
+        write_image(os.path.join(output_dir, filename), data)
+        if timer is not None:
+            timer.record("write", time.perf_counter() - start)
+    elif persist == "async":
+        future = _writer.submit(write_image, os.path.join(output_dir, filename), data)
+        _pending.add(future)
+        future.add_done_callback(_pending.discard)
+    if options["response_mode"] == "stream":
+        result.setdefault("images", {})[filename] = data
+    if key is not None:
+        result["success"].append({key: filename})
+
+
+def load_images(result):
+    """从磁盘读回结果中的截图（缓存命中且需要流式返回时使用）"""
+    images = {}
+    filenames = [filename for item in result["success"] for filename in item.values()]
+    filenames.extend(result.get("thumbnails", {}).values())
+    for filename in filenames:
+        with open(os.path.join(result["dir"], filename), "rb") as f:
+            images[filename] = f.read()
+    return images
+
+
+def flush(timeout=None):
+    """等待后台写盘任务完成"""
+    for future in list(_pending):
+        future.result(timeout)
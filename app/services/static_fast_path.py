@@ -0,0 +1,111 @@
+"""
+本地静态 HTML 快速通道：UTF-8 编码、没有脚本、懒加载与外部资源的自包含页面用 set_content 直接渲染，
+跳过网络等待、就绪检测与滚动。分析结果按文件路径与修改时间、大小缓存，文件变化后重新分析。
+"""
+import os
+import re
+import threading
+
+from app.utils.ttl_cache import TTLCache
+
+# 超过此大小的文件不做分析，走常规流程
+MAX_ANALYZE_BYTES = 2 * 1024 * 1024
+_CACHE_SIZE = 1024
+
+_SCRIPT_RE = re.compile(rb"<script\b|\son[a-z]+\s*=|javascript:", re.I)
+_LAZY_RE = re.compile(rb"\bloading\s*=\s*[\"']?lazy", re.I)
+_EMBED_RE = re.compile(rb"<(?:iframe|frame|object|embed|video|audio|source|portal)\b", re.I)
+_META_REFRESH_RE = re.compile(rb"<meta[^>]+http-equiv\s*=\s*[\"']?refresh", re.I)
+# <meta charset="gbk"> 与 <meta http-equiv="Content-Type" content="text/html; charset=gbk">
+_CHARSET_RE = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.I)
+_UTF8_NAMES = (b"utf-8", b"utf8")
+# 所有资源引用（src / srcset / poster / background、<a> 以外标签的 href 与 xlink:href（link、SVG image/use 等）、
+# CSS url() / @import），值必须是 data: 或文档内 #片段 才算自包含；属性名前不能是字母、数字或连字符，
+# aria-data= / data-href= 之类的自定义属性不算资源引用
+_RESOURCE_RE = re.compile(
+    rb"""(?:(?<![\w-])(?:src|srcset|poster|data|background)\s*=\s*["']?\s*([^"'\s>]*))"""
+    rb"""|(?:<(?!a\b)[a-z][^>]*?(?<![\w-])href\s*=\s*["']?\s*([^"'\s>]*))"""
+    rb"""|(?:url\(\s*["']?\s*([^"')\s]*))"""
+    rb"""|(?:@import\s+["']([^"']*))""",
+    re.I
+)
+
+# (路径, 修改时间, 大小) -> 分析结果，文件变化后旧键不再命中，按 LRU 淘汰
+_cache = TTLCache(maxsize=_CACHE_SIZE, ttl=None)
+_lock = threading.Lock()
+_stats = {"static": 0, "dynamic": 0}
+
+
+def _analyze_bytes(content):
+    """:return: 不能走快速通道的原因，静态页面返回 None"""
+    if _SCRIPT_RE.search(content):
+        return "script"
+    if _LAZY_RE.search(content):
+        return "lazy"
+    if _EMBED_RE.search(content):
+        return "embed"
+    if _META_REFRESH_RE.search(content):
+        return "refresh"
+    # set_content 只接受字符串，页面自己声明的编码不再生效，非 UTF-8 页面走常规 goto 流程
+    charset = _CHARSET_RE.search(content)
+    if charset and charset.group(1).lower() not in _UTF8_NAMES:
+        return "charset"
+    try:
+        content.decode("utf-8")
+    except UnicodeDecodeError:
+        return "charset"
+    for match in _RESOURCE_RE.finditer(content):
+        value = next((g for g in match.groups() if g is not None), b"")
+        # 文档内片段引用（#id，如 SVG <use> 与 url(#gradient)）不依赖外部资源
+        if value and not value.lower().startswith(b"data:") and not value.startswith(b"#"):
+            return "resource"
+    return None
+
+
+def analyze(html_path):
+    """
+    :return: {"static": bool, "reason": 不能走快速通道的原因}
+    """
+    try:
+        stat = os.stat(html_path)
+    except OSError:
+        return {"static": False, "reason": "missing"}
+    key = (html_path, stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    if stat.st_size > MAX_ANALYZE_BYTES:
+        analysis = {"static": False, "reason": "too_large"}
+    else:
+        try:
+            with open(html_path, "rb") as f:
+                reason = _analyze_bytes(f.read())
+        except OSError:
+            reason = "unreadable"
+        analysis = {"static": reason is None, "reason": reason}
+
+    _cache.set(key, analysis)
+    with _lock:
+        _stats["static" if analysis["static"] else "dynamic"] += 1
+    return analysis
+
+
+def use_fast_path(html_path, options):
+    """本地文件、开启 fast_path 且页面自包含时走快速通道"""
+    if not options["fast_path"] or html_path.startswith("http"):
+        return False
+    return analyze(html_path)["static"]
+
+
+def read_html(html_path):
+    with open(html_path, "r", encoding="utf-8-sig") as f:
+        return f.read()
+
+
+def stats():
+    cache = _cache.stats()
+    with _lock:
+        stats = dict(_stats)
+    stats.update(hits=cache["hits"], misses=cache["misses"], entries=cache["size"], hit_rate=cache["hit_rate"])
+    return stats
@@ -0,0 +1,125 @@
+"""
+分块全屏截图：按固定高度逐块截取页面，解码后逐行写入流式 PNG 编码器。
+任一时刻内存中只有一块图像，峰值内存与页面总高度无关。
+"""
+import io
+import struct
+import zlib
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 为可选依赖，缺失时无法解码分块，调用方应回退到普通截图
+    Image = None
+
+PAGE_SIZE_JS = """
+    () => ({
+        width: window.innerWidth,
+        height: Math.max(
+            document.body ? document.body.scrollHeight : 0,
+            document.documentElement.scrollHeight
+        )
+    })
+"""
+
+
+class PngStreamWriter:
+    """
+    流式 PNG 编码器：预先写入宽高，之后逐行追加 RGB 像素，压缩数据攒够后立即写成 IDAT 块
+    """
+
+    def __init__(self, fileobj, width, height, compress_level=6, chunk_size=256 * 1024):
+        self.fileobj = fileobj
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.chunk_size = chunk_size
+        self._compressor = zlib.compressobj(compress_level)
+        self._buffer = bytearray()
+        fileobj.write(b"\x89PNG\r\n\x1a\n")
+        # 8 位 RGB，无隔行
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def _write_chunk(self, tag, data):
+        self.fileobj.write(struct.pack(">I", len(data)))
+        self.fileobj.write(tag)
+        self.fileobj.write(data)
+        self.fileobj.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag)) & 0xffffffff))
+
+    def _flush_idat(self, force=False):
+        while len(self._buffer) >= self.chunk_size or (force and self._buffer):
+            data = bytes(self._buffer[:self.chunk_size])
+            del self._buffer[:self.chunk_size]
+            self._write_chunk(b"IDAT", data)
+
+    def write_rows(self, pixels, rows):
+        """
+        :param pixels: rows 行连续的 RGB 字节，每行 width * 3 字节
+        """
+        stride = self.width * 3
+        rows = min(rows, self.height - self.rows_written)
+        for i in range(rows):
+            # 每行前缀过滤类型 0（None）
+            self._buffer += self._compressor.compress(b"\x00" + pixels[i * stride:(i + 1) * stride])
+        self.rows_written += rows
+        self._flush_idat()
+
+    def close(self):
+        # 页面在截图过程中变矮时用白色补齐剩余行，保证 PNG 行数与 IHDR 一致
+        blank = b"\x00" + b"\xff" * (self.width * 3)
+        while self.rows_written < self.height:
+            self._buffer += self._compressor.compress(blank)
+            self.rows_written += 1
+        self._buffer += self._compressor.flush()
+        self._flush_idat(force=True)
+        self._write_chunk(b"IEND", b"")
+
+
+def _tile_clips(width, height, tile_height):
+    for y in range(0, height, tile_height):
+        yield {"x": 0, "y": y, "width": width, "height": min(tile_height, height - y)}
+
+
+def _decode_tile(data, width, rows):
+    tile = Image.open(io.BytesIO(data)).convert("RGB")
+    if tile.size != (width, rows):
+        tile = tile.crop((0, 0, width, rows))
+    return tile.tobytes()
+
+
+def capture_tiled(page, fileobj, tile_height=4096, max_height=0, compress_level=6):
+    """
+    分块截取整页并写入 fileobj
+    :param tile_height: 每块高度（像素）
+    :param max_height: 最大截取高度，0 表示不限
+    :return: dict width、height、tiles
+    """
+    size = page.evaluate(PAGE_SIZE_JS)
+    width, height = size["width"], size["height"]
+    if max_height:
+        height = min(height, max_height)
+
+    writer = PngStreamWriter(fileobj, width, height, compress_level=compress_level)
+    tiles = 0
+    for clip in _tile_clips(width, height, tile_height):
+        data = page.screenshot(full_page=True, clip=clip, scale="css", timeout=10000)
+        writer.write_rows(_decode_tile(data, width, clip["height"]), clip["height"])
+        tiles += 1
+    writer.close()
+    return {"width": width, "height": height, "tiles": tiles}
+
+
+async def capture_tiled_async(page, fileobj, tile_height=4096, max_height=0, compress_level=6):
+    """capture_tiled 的 async_api 版本"""
+    size = await page.evaluate(PAGE_SIZE_JS)
+    width, height = size["width"], size["height"]
+    if max_height:
+        height = min(height, max_height)
+
+    writer = PngStreamWriter(fileobj, width, height, compress_level=compress_level)
+    tiles = 0
+    for clip in _tile_clips(width, height, tile_height):
+        data = await page.screenshot(full_page=True, clip=clip, scale="css", timeout=10000)
+        writer.write_rows(_decode_tile(data, width, clip["height"]), clip["height"])
+        tiles += 1
+    writer.close()
+    return {"width": width, "height": height, "tiles": tiles}
@@ -1,14 +1,133 @@
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import make_transient_to_detached
+
 from app.models.user import User
 from app.extensions import db
+from app.utils.ttl_cache import TTLCache
+
+# 用户读缓存：缓存行数据而不是 ORM 对象，命中时重建对象并挂到当前 session，不访问数据库
+user_cache = TTLCache(maxsize=10000, ttl=300)
+
+# 单条 IN (...) 查询的最多 id 数
+IN_CHUNK = 1000
+
+
+def _row(user):
+    """缓存全部列（与 get_many 的整行查询一致），不受 __serialize__ 输出字段的限制，命中时才能完整重建对象"""
+    return {c.name: getattr(user, c.name) for c in User.__table__.columns}
+
 
 class UserService:
+    @staticmethod
+    def init_app(app):
+        user_cache.configure(app.config.get("USER_CACHE_SIZE"), app.config.get("USER_CACHE_TTL"))
+
     @staticmethod
     def get_by_id(uid):
-        return User.query.get(uid)
+        row = user_cache.get(uid)
+        if row is not None:
+            user = User(**row)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+        user = User.query.get(uid)
+        if user is not None:
+            user_cache.set(uid, _row(user))
+        return user
 
     @staticmethod
     def create(username, email=None):
         u = User(username=username, email=email)
         db.session.add(u)
         db.session.commit()
+        # 写穿：提交成功后用最新数据覆盖缓存
+        user_cache.set(u.id, _row(u))
         return u
+
+    @staticmethod
+    def get_many(ids):
+        """
+        批量查询：先查缓存，未命中的 id 按 IN_CHUNK 分组各用一条 IN (...) 查询
+        :return: (按请求顺序排列的用户行数据列表, 不存在的 id 列表)
+        """
+        ids = list(dict.fromkeys(ids))
+        rows = {}
+        misses = []
+        for uid in ids:
+            row = user_cache.get(uid)
+            if row is not None:
+                rows[uid] = row
+            else:
+                misses.append(uid)
+        table = User.__table__
+        for start in range(0, len(misses), IN_CHUNK):
+            chunk = misses[start:start + IN_CHUNK]
+            for row in db.session.execute(select(table).where(table.c.id.in_(chunk))).mappings():
+                row = dict(row)
+                rows[row["id"]] = row
+                user_cache.set(row["id"], row)
+        return [rows[uid] for uid in ids if uid in rows], [uid for uid in ids if uid not in rows]
+
+    @staticmethod
+    def bulk_create(items, chunk_size=1000):
+        """
+        批量创建：校验后按 chunk_size 分块，每块一次 executemany 插入并提交。
+        某块插入失败时回滚该块，逐行用 savepoint 重试以定位出错的行。
+        :param items: 可迭代的 (序号, 数据或解析错误) 对
+        :return: {"inserted": 成功行数, "failed": [{"index", "error"}]}
+        """
+        inserted = 0
+        failed = []
+        chunk = []
+        for index, data in items:
+            row, err = UserService._validate(data)
+            if err:
+                failed.append({"index": index, "error": err})
+                continue
+            chunk.append((index, row))
+            if len(chunk) >= chunk_size:
+                inserted += UserService._insert_chunk(chunk, failed)
+                chunk = []
+        if chunk:
+            inserted += UserService._insert_chunk(chunk, failed)
+        return {"inserted": inserted, "failed": failed}
+
+    @staticmethod
+    def _validate(data):
+        if isinstance(data, Exception):
+            return None, f"invalid json: {data}"
+        if not isinstance(data, dict):
+            return None, "row must be an object"
+        username = data.get("username")
+        email = data.get("email")
+        if not username or not isinstance(username, str):
+            return None, "username required"
+        if len(username) > User.username.type.length:
+            return None, "username too long"
+        if email is not None and (not isinstance(email, str) or len(email) > User.email.type.length):
+            return None, "invalid email"
+        return {"username": username, "email": email}, None
+
+    @staticmethod
+    def _insert_chunk(chunk, failed):
+        try:
+            db.session.execute(insert(User), [row for _, row in chunk])
+            db.session.commit()
+            return len(chunk)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"[WARN] 批量插入失败，逐行重试: {e.__class__.__name__}")
+        inserted = 0
+        for index, row in chunk:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(User), [row])
+                inserted += 1
+            except SQLAlchemyError as e:
+                failed.append({"index": index, "error": str(e.orig if hasattr(e, "orig") else e)})
+        db.session.commit()
+        return inserted
+
+    @staticmethod
+    def cache_stats():
+        return user_cache.stats()
@@ -0,0 +1,69 @@
+"""
+缓存共用的部分：命中率统计，以及 LRU 索引（OrderedDict，最久未使用在前）的懒加载与节流落盘
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+
+# 索引最短落盘间隔（秒），退出时强制落盘
+SAVE_INTERVAL = 5
+
+
+def with_hit_rate(stats):
+    """在 hits / misses 统计上补充 hit_rate"""
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0
+    return stats
+
+
+class PersistentIndexMixin:
+    """
+    子类提供 index_path、_lock、_bytes 与 _stats，在 _index_loaded 中累计资源体字节数等派生状态；
+    除 flush 与 stats 外的方法都要求调用方已持有 _lock
+    """
+    _index_label = "缓存索引"
+    _entries = None
+    _saved_at = 0
+
+    def _index_loaded(self, key, entry):
+        """从索引文件读入一个条目后调用"""
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for key, entry in json.load(f):
+                    self._entries[key] = entry
+                    self._index_loaded(key, entry)
+        except (OSError, ValueError):
+            pass
+
+    def _save(self, force=False):
+        now = time.time()
+        if not force and now - self._saved_at < SAVE_INTERVAL:
+            return
+        self._saved_at = now
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self._entries.items()), f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"[WARN] 保存{self._index_label}失败: {e}")
+
+    def flush(self):
+        with self._lock:
+            if self._entries is not None:
+                self._save(force=True)
+
+    def stats(self):
+        with self._lock:
+            self._load()
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return with_hit_rate(stats)
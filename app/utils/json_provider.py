@@ -0,0 +1,95 @@
+"""
+JSON 编解码：orjson 可用时用 orjson，否则退回 Flask 默认实现（标准库 json）。
+iter_encode 把大列表分块编码，配合 Response 流式返回，不在内存中拼出完整响应体。
+"""
+import json
+import types
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 流式编码时每块包含的列表元素数
+STREAM_CHUNK_ITEMS = 500
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    注册方式：app.json = FastJSONProvider(app)。
+    sort_keys 与 compact 语义与默认实现一致；orjson 始终输出 UTF-8，不做 ensure_ascii 转义。
+    调用方传入 json.dumps 的额外参数（cls、indent 等）时交给默认实现处理。
+    """
+
+    def _options(self, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, pretty=False):
+        if orjson is None:
+            kwargs = {"indent": 2} if pretty else {"separators": (",", ":")}
+            return super().dumps(obj, **kwargs).encode("utf-8")
+        return orjson.dumps(obj, default=self.default, option=self._options(pretty))
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = self.dumps_bytes(obj, pretty=pretty)
+        if pretty:
+            body += b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _is_sequence(obj):
+    return isinstance(obj, (list, tuple, types.GeneratorType, map, filter))
+
+
+def iter_encode(provider, obj, chunk_items=STREAM_CHUNK_ITEMS):
+    """
+    逐块编码：dict 逐键展开，列表与生成器按 chunk_items 个元素一块编码，其余值整体编码
+    :param provider: FastJSONProvider 实例（通常为 current_app.json）
+    """
+    if isinstance(obj, dict):
+        yield b"{"
+        for i, (key, value) in enumerate(obj.items()):
+            yield (b"," if i else b"") + provider.dumps_bytes(str(key)) + b":"
+            yield from iter_encode(provider, value, chunk_items)
+        yield b"}"
+    elif _is_sequence(obj):
+        yield b"["
+        first = True
+        chunk = []
+        for item in obj:
+            chunk.append(item)
+            if len(chunk) >= chunk_items:
+                yield (b"" if first else b",") + provider.dumps_bytes(chunk)[1:-1]
+                first = False
+                chunk = []
+        if chunk:
+            yield (b"" if first else b",") + provider.dumps_bytes(chunk)[1:-1]
+        yield b"]"
+    else:
+        yield provider.dumps_bytes(obj)
+
+
+def dumps_bytes(obj):
+    """不依赖应用上下文的编码，供 NDJSON 等逐行输出使用"""
+    if orjson is None:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
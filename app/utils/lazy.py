@@ -0,0 +1,26 @@
+"""
+延迟加载的视图：注册路由时只记录导入路径，第一次请求时才导入视图模块，
+模块内的重依赖（如 playwright）不计入应用启动时间。
+"""
+from flask import current_app
+from werkzeug.utils import import_string
+
+
+class LazyView:
+    def __init__(self, import_name, loader=None):
+        """
+        :param import_name: 视图函数的完整导入路径，如 app.controllers.snap_controller.snap
+        :param loader: 每次调用前执行的 loader(app)，用于按需初始化视图依赖的服务，须自行保证幂等
+        """
+        self.__module__, self.__name__ = import_name.rsplit(".", 1)
+        self.import_name = import_name
+        self.loader = loader
+        self._view = None
+
+    def __call__(self, *args, **kwargs):
+        if self.loader is not None:
+            self.loader(current_app._get_current_object())
+        view = self._view
+        if view is None:
+            view = self._view = import_string(self.import_name)
+        return view(*args, **kwargs)
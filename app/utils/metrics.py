@@ -0,0 +1,134 @@
+"""
+进程内指标：直方图与计数器，按 Prometheus 文本格式输出到 /metrics
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+def _label_str(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_label_str(names, key + (bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_label_str(names, key + ('+Inf',))} {series['count']}")
+                lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+SNAP_STAGE_SECONDS = registry.register(Histogram(
+    "snap_stage_seconds", "Time spent in each capture_snap stage", labelnames=("stage",)
+))
+SNAP_CAPTURE_SECONDS = registry.register(Histogram(
+    "snap_capture_seconds", "End-to-end capture time per engine", labelnames=("engine", "status")
+))
+SNAP_CAPTURES_TOTAL = registry.register(Counter(
+    "snap_captures_total", "Captures by engine and status", labelnames=("engine", "status")
+))
+SNAP_ROUTED_REQUESTS_TOTAL = registry.register(Counter(
+    "snap_routed_requests_total", "Page requests by routing action", labelnames=("action",)
+))
+
+
+class StageTimer:
+    """
+    单次截图的分阶段计时：每个阶段同时记入 snap_stage_seconds 直方图，
+    同名阶段多次出现时累加，as_dict() 返回毫秒数供结果中的 timings 使用
+    """
+
+    def __init__(self, histogram=SNAP_STAGE_SECONDS):
+        self.histogram = histogram
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0) + seconds
+        if self.histogram is not None:
+            self.histogram.observe(seconds, stage=name)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        timings = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        timings["total"] = round(self.elapsed() * 1000, 1)
+        return timings
@@ -1,3 +1,49 @@
-from flask import jsonify
+import io
+import zipfile
+
+from flask import Response, current_app, jsonify, stream_with_context
+
+from app.utils.json_provider import iter_encode
+
 def success(data=None): return jsonify({'code':0,'data':data})
 def error(msg): return jsonify({'code':1,'msg':msg})
+
+
+def should_stream(count):
+    """列表元素数达到 JSON_STREAM_THRESHOLD 时改为流式编码，0 表示不启用"""
+    threshold = current_app.config.get('JSON_STREAM_THRESHOLD', 0)
+    return bool(threshold) and count >= threshold
+
+
+def success_stream(data=None):
+    """与 success 相同的响应结构，大列表分块编码后流式输出"""
+    body = iter_encode(current_app.json, {'code': 0, 'data': data})
+    return Response(stream_with_context(body), mimetype='application/json')
+
+
+class _ChunkWriter(io.RawIOBase):
+    """不可 seek 的写缓冲，zipfile 写入后由生成器按块取走"""
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_stream(files):
+    """把 {文件名: 字节} 逐个写入 zip 并按块输出，用于 Response 流式返回"""
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, "w", zipfile.ZIP_STORED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+            yield writer.drain()
+    yield writer.drain()
@@ -0,0 +1,47 @@
+"""
+模型序列化：每个模型类只在第一次序列化时解析字段列表并生成 attrgetter，之后按缓存直接取值，
+不再每次遍历 __table__.columns。字段由模型的 __serialize__ 声明，未声明时取全部列。
+"""
+import threading
+from operator import attrgetter
+
+_serializers = {}
+_lock = threading.Lock()
+
+
+def serializer_for(model):
+    """:return: (字段名元组, 一次取出所有字段值的函数)"""
+    entry = _serializers.get(model)
+    if entry is None:
+        with _lock:
+            entry = _serializers.get(model)
+            if entry is None:
+                fields = tuple(getattr(model, "__serialize__", None) or (c.key for c in model.__table__.columns))
+                getter = attrgetter(*fields)
+                if len(fields) == 1:
+                    single = getter
+                    getter = lambda obj: (single(obj),)
+                entry = _serializers[model] = (fields, getter)
+    return entry
+
+
+def to_dict(obj):
+    fields, getter = serializer_for(type(obj))
+    return dict(zip(fields, getter(obj)))
+
+
+def to_dicts(objs):
+    """同一模型的对象列表，复用同一个 getter"""
+    objs = list(objs)
+    if not objs:
+        return []
+    fields, getter = serializer_for(type(objs[0]))
+    return [dict(zip(fields, getter(obj))) for obj in objs]
+
+
+class SerializerMixin:
+    """模型混入 to_dict()；子类用 __serialize__ = ("id", ...) 声明输出字段"""
+    __serialize__ = None
+
+    def to_dict(self):
+        return to_dict(self)
@@ -0,0 +1,49 @@
+"""
+请求合并（single-flight）：相同键的并发调用只执行一次，其余调用等待并共享同一结果
+"""
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def do(self, key, fn, timeout=None):
+        """
+        :param key: 合并键，相同键的在途调用共享结果
+        :param fn: 无参函数，只由第一个到达的调用执行
+        :param timeout: 等待在途调用结果的最长时间（秒），超时抛出 TimeoutError
+        :return: (结果, 是否复用了其他调用的结果)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._stats["leaders"] += 1
+            else:
+                self._stats["followers"] += 1
+
+        if not leader:
+            return future.result(timeout), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
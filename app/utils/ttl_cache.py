@@ -0,0 +1,67 @@
+"""
+进程内 LRU + TTL 缓存，线程安全，统计命中率
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from app.utils.cache_index import with_hit_rate
+
+
+class TTLCache:
+    def __init__(self, maxsize=10000, ttl=300):
+        """
+        :param maxsize: 最大条目数，超过后淘汰最久未使用的条目，0 表示不缓存
+        :param ttl: 条目存活时间（秒），None 表示不过期，只按 LRU 淘汰
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+
+    def configure(self, maxsize=None, ttl=None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._data.clear()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] <= now:
+                del self._data[key]
+                item = None
+            if item is None:
+                self._stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return item[1]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            expires = float("inf") if self.ttl is None else time.monotonic() + self.ttl
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            self._stats["sets"] += 1
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._data)
+            stats["maxsize"] = self.maxsize
+            stats["ttl"] = self.ttl
+        return with_hit_rate(stats)
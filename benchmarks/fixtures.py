@@ -0,0 +1,99 @@
+"""
+基准测试用的本地 HTML 语料：短页面、30000px 长页面、懒加载图片页面、50 个目标元素的页面
+"""
+import io
+import os
+
+from app.services.tiled_capture import PngStreamWriter
+
+ELEMENT_COUNT = 50
+IMAGE_COUNT = 60
+
+
+def _png(width, height, color):
+    buf = io.BytesIO()
+    writer = PngStreamWriter(buf, width, height)
+    row = bytes(color) * width
+    writer.write_rows(row * height, height)
+    writer.close()
+    return buf.getvalue()
+
+
+def _page(title, body, style=""):
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ margin: 0; font-family: sans-serif; }}
+.block {{ padding: 24px; border-bottom: 1px solid #ddd; }}
+{style}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def _short():
+    rows = "\n".join(
+        f'<div class="block"><h2>Section {i}</h2><p>{"Lorem ipsum dolor sit amet. " * 20}</p></div>'
+        for i in range(5)
+    )
+    return _page("short", rows)
+
+
+def _tall(height=30000):
+    count = height // 500
+    rows = "\n".join(
+        f'<div class="block" style="height:452px;background:hsl({i * 7 % 360},60%,85%)">'
+        f'<h2>Row {i}</h2><p>{"Report content. " * 40}</p></div>'
+        for i in range(count)
+    )
+    return _page("tall", rows)
+
+
+def _lazy_images():
+    rows = "\n".join(
+        f'<div class="block"><h3>Image {i}</h3>'
+        f'<img src="img/{i % 6}.png" loading="lazy" width="800" height="400"></div>'
+        for i in range(IMAGE_COUNT)
+    )
+    return _page("lazy", rows)
+
+
+def _elements():
+    rows = "\n".join(
+        f'<div class="block" id="el{i}" style="background:hsl({i * 13 % 360},50%,90%)">'
+        f'<h3>Chart {i}</h3><table>{"<tr><td>cell</td><td>1234.56</td><td>78.9%</td></tr>" * 6}</table></div>'
+        for i in range(ELEMENT_COUNT)
+    )
+    return _page("elements", rows)
+
+
+FIXTURES = {
+    "short": {"file": "short.html", "build": _short, "element_ids": []},
+    "tall_30k": {"file": "tall_30k.html", "build": _tall, "element_ids": []},
+    "lazy_images": {"file": "lazy_images.html", "build": _lazy_images, "element_ids": []},
+    "elements_50": {
+        "file": "elements_50.html",
+        "build": _elements,
+        "element_ids": [f"el{i}" for i in range(ELEMENT_COUNT)]
+    },
+}
+
+
+def build_corpus(root):
+    """生成全部语料到 root 目录，返回 root"""
+    os.makedirs(os.path.join(root, "img"), exist_ok=True)
+    colors = [(230, 80, 80), (80, 200, 120), (80, 120, 230), (240, 200, 60), (160, 90, 200), (60, 190, 200)]
+    for i, color in enumerate(colors):
+        with open(os.path.join(root, "img", f"{i}.png"), "wb") as f:
+            f.write(_png(800, 400, color))
+    for fixture in FIXTURES.values():
+        with open(os.path.join(root, fixture["file"]), "w", encoding="utf-8") as f:
+            f.write(fixture["build"]())
+    return root
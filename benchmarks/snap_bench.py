@@ -0,0 +1,227 @@
+"""
+截图基准测试：在本地 HTTP 服务上提供生成的 HTML 语料，按不同并发度驱动各截图引擎，
+输出 p50/p95/p99 延迟、吞吐、峰值内存与 Chromium 进程数（JSON）。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.snap_bench --engines service,service_pool,async --concurrency 1,4,8 --requests 16
+"""
+import argparse
+import functools
+import http.server
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import psutil
+except ImportError:  # psutil 为可选依赖，缺失时不统计内存与进程数
+    psutil = None
+
+from benchmarks.fixtures import FIXTURES, build_corpus
+from app.services.browser_pool import BrowserPool
+from app.services.snap_service import PlaywrightSnapService
+from app.services.snap_service1 import PlaywrightSnapService1
+from app.services.snap_service2 import PlaywrightSnapService2
+from app.services.async_snap_service import AsyncPlaywrightSnapService
+from app.services.snap_fleet import SnapFleet
+
+
+def _legacy(service_cls):
+    service = service_cls()
+    return service, lambda s, path, token, ids, options: s.capture_snap(path, token, ids)
+
+
+def _current(pool_size=0, options=None, page_max_uses=0):
+    def factory():
+        pool = BrowserPool(size=pool_size, page_max_uses=page_max_uses) if pool_size else None
+        service = PlaywrightSnapService(pool=pool)
+
+        def call(s, path, token, ids, run_options):
+            return s.capture_snap(path, token, ids, options=dict(options or {}, **run_options))
+        return service, call
+    return factory
+
+
+def _async():
+    service = AsyncPlaywrightSnapService(concurrency=32)
+    return service, lambda s, path, token, ids, options: s.capture_snap(path, token, ids, options=options)
+
+
+def _fleet(workers=0):
+    def factory():
+        fleet = SnapFleet(workers=workers, pool_size=2)
+        return fleet, lambda s, path, token, ids, options: s.capture_snap(path, token, ids, options=options)
+    return factory
+
+
+# 引擎名 -> 工厂函数，返回 (服务实例, 调用函数)；新增引擎在这里注册
+ENGINES = {
+    "service": _current(),
+    "service_pool": _current(pool_size=4),
+    "service_batch": _current(pool_size=4, options={"batch": True}),
+    "service_reuse": _current(pool_size=4, page_max_uses=50),
+    "service1": functools.partial(_legacy, PlaywrightSnapService1),
+    "service2": functools.partial(_legacy, PlaywrightSnapService2),
+    "async": _async,
+    "fleet": _fleet(),
+}
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_corpus(root):
+    """在随机端口上提供语料目录，返回 (server, base_url)"""
+    handler = functools.partial(_QuietHandler, directory=root)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class ResourceSampler(threading.Thread):
+    """后台采样本进程及所有子进程的常驻内存与 Chromium 进程数，记录峰值"""
+
+    def __init__(self, interval=0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_rss_mb = None
+        self.peak_chromium = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        if psutil is None:
+            return
+        me = psutil.Process(os.getpid())
+        self.peak_rss_mb, self.peak_chromium = 0, 0
+        while not self._stop_event.is_set():
+            rss, chromium = 0, 0
+            for proc in [me] + me.children(recursive=True):
+                try:
+                    rss += proc.memory_info().rss
+                    name = proc.name().lower()
+                except psutil.Error:
+                    continue
+                if "chrom" in name or "headless_shell" in name:
+                    chromium += 1
+            self.peak_rss_mb = max(self.peak_rss_mb, rss / (1024 * 1024))
+            self.peak_chromium = max(self.peak_chromium, chromium)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return {
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None,
+            "peak_chromium_processes": self.peak_chromium
+        }
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def run_case(service, call, html_path, element_ids, concurrency, requests, options):
+    latencies, failures, errors = [], 0, []
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            result = call(service, html_path, f"bench{i}", list(element_ids), options)
+            ok = bool(result["success"]) and not result["failed"]
+        except Exception as e:
+            errors.append(str(e))
+            ok = False
+        return time.perf_counter() - start, ok
+
+    sampler = ResourceSampler()
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for seconds, ok in executor.map(one, range(requests)):
+            latencies.append(seconds)
+            failures += 0 if ok else 1
+    wall = time.perf_counter() - started
+    report = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "failures": failures,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "captures_per_sec": round(requests / wall, 2),
+    }
+    report.update(sampler.stop())
+    if errors:
+        report["first_error"] = errors[0][:300]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot benchmark")
+    parser.add_argument("--engines", default="service,service_pool,async")
+    parser.add_argument("--fixtures", default=",".join(FIXTURES))
+    parser.add_argument("--concurrency", default="1,4,8")
+    parser.add_argument("--requests", type=int, default=8, help="每个并发度的请求数")
+    parser.add_argument("--mode", choices=("http", "file"), default="http", help="通过本地 HTTP 服务或 file:// 打开")
+    parser.add_argument("--corpus-dir", default=None, help="语料目录，默认生成到临时目录")
+    parser.add_argument("--persist", choices=("sync", "async", "none"), default="none",
+                        help="截图落盘方式（仅当前版本引擎支持）")
+    parser.add_argument("--out", default=None, help="结果 JSON 输出文件，默认打印到标准输出")
+    args = parser.parse_args(argv)
+
+    engines = [e for e in args.engines.split(",") if e]
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {unknown}, available: {list(ENGINES)}")
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    options = {"persist": args.persist, "cache": False}
+
+    root = build_corpus(args.corpus_dir or tempfile.mkdtemp(prefix="snap-bench-"))
+    server, base_url = serve_corpus(root)
+    report = {"corpus": root, "mode": args.mode, "started_at": time.time(), "results": []}
+
+    try:
+        for engine in engines:
+            service, call = ENGINES[engine]()
+            try:
+                for name in args.fixtures.split(","):
+                    fixture = FIXTURES[name]
+                    if args.mode == "http":
+                        html_path = f"{base_url}/{fixture['file']}"
+                    else:
+                        html_path = os.path.join(root, fixture["file"])
+                    for level in levels:
+                        print(f"[bench] {engine} {name} concurrency={level}", file=sys.stderr)
+                        case = run_case(service, call, html_path, fixture["element_ids"], level, args.requests,
+                                        options)
+                        case.update({"engine": engine, "fixture": name})
+                        report["results"].append(case)
+            finally:
+                if hasattr(service, "shutdown"):
+                    service.shutdown()
+                elif getattr(service, "pool", None) is not None:
+                    service.pool.shutdown()
+    finally:
+        server.shutdown()
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+gunicorn 生产配置：gunicorn -c gunicorn.conf.py wsgi:app
+
+- 并发：WEB_CONCURRENCY 个工作进程 × GUNICORN_THREADS 个线程（gthread），
+  截图请求在线程中阻塞等待浏览器池，线程数应不小于 SNAP_POOL_SIZE
+- 浏览器：playwright 不能跨 fork 使用，浏览器池在每个工作进程 fork 之后启动（post_worker_init），
+  主进程预加载应用时截图服务保持未初始化（见 snap_loader）
+- 退出：收到 SIGTERM 后停止接收新连接，等待在途请求完成（graceful_timeout），
+  再执行完排队的截图任务、关闭浏览器、等待图片写盘（worker_exit）
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+backlog = int(os.getenv('GUNICORN_BACKLOG', 2048))
+
+# 长连接：keepalive 需大于前置负载均衡器的空闲超时，避免其复用已被关闭的连接
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 75))
+# 单个请求最长处理时间（秒），截图请求的默认截止时间为 30s
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 60))
+
+# 处理一定数量的请求后重启工作进程，限制长时间运行的内存增长；jitter 避免所有进程同时重启
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# 预加载应用可共享只读内存并加快工作进程重启；截图服务延迟初始化，fork 前不会启动浏览器
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    """工作进程 fork 并加载应用之后启动浏览器池（SNAP_WARMUP_ON_FORK=false 时改为第一次请求时启动）"""
+    if os.getenv('SNAP_WARMUP_ON_FORK', 'true').lower() not in ('1', 'true', 'yes'):
+        return
+    from app.services.snap_loader import snap_loader
+    try:
+        snap_loader.warmup(worker.wsgi)
+    except Exception as e:
+        worker.log.warning('snap warmup failed: %s', e)
+
+
+def worker_exit(server, worker):
+    """在途请求结束后，执行完排队的截图任务并关闭浏览器"""
+    from app.services.snap_loader import snap_loader
+    app = getattr(worker, 'wsgi', None)
+    if app is not None:
+        snap_loader.shutdown(app, timeout=graceful_timeout)
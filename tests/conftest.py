@@ -0,0 +1,4 @@
+import os
+
+# Config 在导入时读取环境变量，必须在导入 app 之前指定内存 SQLite
+os.environ["DATABASE_URL"] = "sqlite://"
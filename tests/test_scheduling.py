@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.services.scheduling import (
+    LANES, AsyncDeadlineGate, DeadlineQueue, ServiceTimeEstimator, resolve_deadline
+)
+
+
+def test_deadline_queue_orders_by_deadline_then_lane_then_arrival():
+    queue = DeadlineQueue()
+    queue.put("late", deadline=30, priority="interactive")
+    queue.put("background-tie", deadline=10, priority="background")
+    queue.put("interactive-tie", deadline=10, priority="interactive")
+    queue.put("early", deadline=5, priority="background")
+    queue.put("interactive-tie-2", deadline=10, priority="interactive")
+
+    assert queue.ahead_of(10) == 4
+    assert [queue.get() for _ in range(queue.qsize())] == [
+        "early", "interactive-tie", "interactive-tie-2", "background-tie", "late"
+    ]
+
+
+def test_resolve_deadline_uses_lane_budget_explicit_deadline_and_timeout():
+    now = 1000.0
+    assert resolve_deadline("batch", now=now) == now + LANES["batch"][1]
+    assert resolve_deadline("unknown", now=now) == now + LANES["interactive"][1]
+    assert resolve_deadline("background", deadline_ms=2500, now=now) == now + 2.5
+    assert resolve_deadline("background", timeout=7, now=now) == now + 7
+
+
+def test_estimator_has_no_opinion_before_first_sample():
+    assert ServiceTimeEstimator().estimate_finish(ahead=100, running=4, workers=1, now=0) is None
+
+
+def test_estimator_tracks_moving_average_and_backlog():
+    estimator = ServiceTimeEstimator(alpha=0.5)
+    estimator.observe(2.0)
+    estimator.observe(4.0)
+    assert estimator.average == pytest.approx(3.0)
+    # (ahead + running / 2) / workers 个任务排在前面，再加上自身
+    assert estimator.estimate_finish(ahead=4, running=2, workers=2, now=100) == pytest.approx(100 + 3.5 * 3.0)
+
+
+def test_async_gate_hands_slots_to_earliest_deadline():
+    async def scenario():
+        gate = AsyncDeadlineGate(1)
+        order = []
+        await gate.acquire(deadline=0)
+
+        async def task(name, deadline, priority="interactive"):
+            await gate.acquire(deadline, priority)
+            order.append(name)
+            gate.release()
+
+        tasks = [
+            asyncio.ensure_future(task("late", 30)),
+            asyncio.ensure_future(task("early", 10)),
+            asyncio.ensure_future(task("cancelled", 5)),
+            asyncio.ensure_future(task("mid", 20)),
+        ]
+        await asyncio.sleep(0)
+        assert gate.waiting() == 4
+        assert gate.ahead_of(20) == 3
+        tasks[2].cancel()
+        await asyncio.sleep(0)
+        assert gate.waiting() == 3
+
+        gate.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert gate.busy == 0
+        return order
+
+    assert asyncio.run(scenario()) == ["early", "mid", "late"]
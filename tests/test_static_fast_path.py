@@ -0,0 +1,59 @@
+import pytest
+
+from app.services import static_fast_path
+from app.services.static_fast_path import _analyze_bytes
+
+
+@pytest.mark.parametrize("html, reason", [
+    (b"<html><body><p>hello</p></body></html>", None),
+    (b'<svg><use href="#icon"/></svg><div style="fill: url(#g)"></div>', None),
+    (b'<img src="data:image/png;base64,AAAA">', None),
+    (b'<a href="https://example.com">link</a>', None),
+    (b'<div aria-data="x" data-href="https://example.com" foo-data="y.png">text</div>', None),
+    (b'<meta charset="utf-8"><p>\xe4\xbd\xa0\xe5\xa5\xbd</p>', None),
+    (b"<script>alert(1)</script>", "script"),
+    (b'<button onclick="go()">go</button>', "script"),
+    (b'<img loading="lazy" src="data:,">', "lazy"),
+    (b'<iframe srcdoc="x"></iframe>', "embed"),
+    (b'<meta http-equiv="refresh" content="0; url=/next">', "refresh"),
+    (b'<meta charset="gbk"><p>text</p>', "charset"),
+    (b'<meta http-equiv="Content-Type" content="text/html; charset=GB2312">', "charset"),
+    (b"<p>\xc4\xe3\xba\xc3</p>", "charset"),
+    (b'<img src="logo.png">', "resource"),
+    (b'<link rel="stylesheet" href="style.css">', "resource"),
+    (b'<div style="background: url(\'bg.png\')"></div>', "resource"),
+    (b'<style>@import "theme.css";</style>', "resource"),
+    (b'<object data="movie.swf"></object>', "embed"),
+    (b'<svg><image xlink:href="photo.jpg"/></svg>', "resource"),
+])
+def test_analyze_bytes(html, reason):
+    assert _analyze_bytes(html) == reason
+
+
+def test_analyze_reuses_result_until_file_changes(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_bytes(b"<p>static</p>")
+    before = static_fast_path.stats()
+
+    assert static_fast_path.analyze(str(page)) == {"static": True, "reason": None}
+    assert static_fast_path.analyze(str(page)) == {"static": True, "reason": None}
+    page.write_bytes(b"<p>now with <script>a script</script></p>")
+    assert static_fast_path.analyze(str(page)) == {"static": False, "reason": "script"}
+
+    after = static_fast_path.stats()
+    assert after["misses"] - before["misses"] == 2
+    assert after["hits"] - before["hits"] == 1
+
+
+def test_use_fast_path_skips_urls_and_disabled_option(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_bytes(b"<p>static</p>")
+    assert static_fast_path.use_fast_path(str(page), {"fast_path": True})
+    assert not static_fast_path.use_fast_path(str(page), {"fast_path": False})
+    assert not static_fast_path.use_fast_path("https://example.com/page.html", {"fast_path": True})
+
+
+def test_read_html_strips_utf8_bom(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_bytes(b"\xef\xbb\xbf<p>\xe4\xbd\xa0\xe5\xa5\xbd</p>")
+    assert static_fast_path.read_html(str(page)) == "<p>你好</p>"
@@ -0,0 +1,75 @@
+import json
+
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.services.user_service import UserService
+
+
+def _app():
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def test_bulk_ndjson_reports_failed_rows_and_inserts_the_rest():
+    app = _app()
+    app.config["USER_BULK_CHUNK"] = 2
+    lines = [
+        json.dumps({"username": "alice", "email": "alice@example.com"}),
+        "{not json",
+        json.dumps({"email": "nobody@example.com"}),
+        json.dumps(["bob"]),
+        json.dumps({"username": "x" * 65}),
+        json.dumps({"username": "carol", "email": 42}),
+        json.dumps({"username": "dave"}),
+        json.dumps({"username": "erin", "email": "erin@example.com"}),
+    ]
+    body = "\n".join(lines[:2]) + "\n\n" + "\n".join(lines[2:]) + "\n"
+
+    response = app.test_client().post("/user/bulk", data=body, content_type="application/x-ndjson")
+
+    data = response.get_json()["data"]
+    assert data["inserted"] == 3
+    assert data["failed"] == [
+        {"index": 1, "error": data["failed"][0]["error"]},
+        {"index": 2, "error": "username required"},
+        {"index": 3, "error": "row must be an object"},
+        {"index": 4, "error": "username too long"},
+        {"index": 5, "error": "invalid email"},
+    ]
+    assert data["failed"][0]["error"].startswith("invalid json")
+    with app.app_context():
+        assert sorted(u.username for u in User.query.all()) == ["alice", "dave", "erin"]
+
+
+def test_bulk_json_body_must_be_an_array():
+    app = _app()
+    client = app.test_client()
+
+    ok = client.post("/user/bulk", json=[{"username": "alice"}, {"username": ""}]).get_json()["data"]
+    bad = client.post("/user/bulk", json={"username": "bob"}).get_json()["data"]
+
+    assert ok == {"inserted": 1, "failed": [{"index": 1, "error": "username required"}]}
+    assert bad["inserted"] == 0 and bad["failed"][0]["index"] == 0
+
+
+def test_failed_chunk_is_retried_row_by_row():
+    app = _app()
+    with app.app_context():
+        db.session.add(User(id=1, username="existing"))
+        db.session.commit()
+        failed = []
+
+        inserted = UserService._insert_chunk([
+            (0, {"username": "alice", "email": None}),
+            (1, {"id": 1, "username": "duplicate", "email": None}),
+            (2, {"username": "bob", "email": None}),
+        ], failed)
+
+        assert inserted == 2
+        assert [f["index"] for f in failed] == [1]
+        assert "UNIQUE" in failed[0]["error"]
+        assert sorted(u.username for u in User.query.all()) == ["alice", "bob", "existing"]
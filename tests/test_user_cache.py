@@ -0,0 +1,24 @@
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.services.user_service import user_cache
+
+
+def test_repeated_get_hits_cache():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        # 直接写库，不经过 UserService.create 的写穿缓存
+        db.session.add(User(id=1, username="alice", email="alice@example.com"))
+        db.session.commit()
+    user_cache.clear()
+    client = app.test_client()
+    before = client.get("/user/cache/stats").get_json()["data"]
+
+    first = client.get("/user/1").get_json()
+    second = client.get("/user/1").get_json()
+
+    after = client.get("/user/cache/stats").get_json()["data"]
+    assert first == second == {"code": 0, "data": {"id": 1, "username": "alice", "email": "alice@example.com"}}
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
@@ -0,0 +1,6 @@
+"""
+生产环境入口：gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import create_app
+
+app = create_app()